@@ -1,22 +1,26 @@
 import streamlit as st
 import os
+import time
+import shutil
+import hashlib
 import tempfile
-import traceback
-from report_generator import generate_pdf_report, combine_pdfs, generate_pdf_report_with_audio
-from utils import save_uploaded_file, extract_cv_text
-from cv_processor import process_cv
-from audio_processor import AudioProcessor
-from utils.visualization import create_radar_chart
+from report_generator import merge_reports, get_report_pool, report_workers
+from utils import extract_cv_text
+from utils.cache import env_flag
+from cv_processor import ANALYSIS_CACHE, EXTRACTION_CACHE
+from pipeline import (process_batch, overlap_with_audio, prescreen_summary,
+                      DEFAULT_MAX_WORKERS, REPORT_POOL)
+from job_store import JobStore, DEFAULT_JOB_DB
+from dedup import DuplicateIndex, DEFAULT_DEDUP_DB
+from utils.visualization import create_radar_figure
 import ssl
-import whisper
 
 import asyncio
 import sys
 os.environ['STREAMLIT_SERVER_ENABLE_STATIC_FILE_WATCHER'] = 'false'
 
-# Disable Torch class inspection
-import torch
-torch._C._disable_class_wrapper = True
+# The audio stack (torch, whisper, ffmpeg helpers) is imported by load_processor
+# and plotly by the chart helpers, so the CV-only path and reruns skip them.
 
 if sys.platform == "win32" and (3, 8, 0) <= sys.version_info < (3, 9, 0):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -29,12 +33,67 @@ st.runtime.instances = []
 @st.cache_resource
 def load_processor():
     try:
+        # torch/whisper load here on first audio use, not at script start
+        from audio_processor import AudioProcessor
+
         ssl._create_default_https_context = ssl._create_unverified_context
-        return AudioProcessor(model_size="base")  # or "tiny" for less powerful machines
+        processor = AudioProcessor(model_size="base",  # or "tiny" for less powerful machines
+                                   backend=st.secrets.get("ASR_BACKEND"))  # "torch" or "ctranslate2"
+        processor.warm_up()
+        return processor
     except Exception as e:
         st.error(f"Failed to initialize audio processor: {str(e)}")
         return None
 
+@st.cache_resource
+def load_job_store():
+    return JobStore(st.secrets.get("JOB_DB", DEFAULT_JOB_DB))
+
+@st.cache_resource
+def load_dedup_index():
+    return DuplicateIndex(st.secrets.get("DEDUP_DB", DEFAULT_DEDUP_DB))
+
+SESSION_TEMP_PREFIX = "cv_analyser_"
+STALE_TEMP_DIR_SECONDS = 6 * 3600
+
+def cleanup_stale_temp_dirs(max_age: float = STALE_TEMP_DIR_SECONDS):
+    """Remove temp dirs left behind by sessions that are gone"""
+    now = time.time()
+    for entry in os.scandir(tempfile.gettempdir()):
+        try:
+            if (entry.name.startswith(SESSION_TEMP_PREFIX) and entry.is_dir()
+                    and now - entry.stat().st_mtime > max_age):
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            continue
+
+def session_temp_dir() -> str:
+    """One working directory per browser session instead of one per rerun"""
+    temp_dir = st.session_state.get("temp_dir")
+    if temp_dir is None or not os.path.isdir(temp_dir):
+        cleanup_stale_temp_dirs()
+        temp_dir = tempfile.mkdtemp(prefix=SESSION_TEMP_PREFIX)
+        st.session_state["temp_dir"] = temp_dir
+    else:
+        os.utime(temp_dir, None)  # still in use
+    return temp_dir
+
+def file_identity(uploaded_file) -> str:
+    """Stable id for an upload across reruns"""
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id:
+        return file_id
+    return hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+
+def prune_session_results(current_ids):
+    """Forget results (and saved uploads) for files no longer in the uploader"""
+    memo = st.session_state.setdefault("cv_outcomes", {})
+    for key in [k for k in memo if k[0] not in current_ids]:
+        outcome = memo.pop(key)
+        if outcome.get("file_path") and os.path.exists(outcome["file_path"]):
+            os.unlink(outcome["file_path"])
+    return memo
+
 def display_results(cv_analysis, audio_analysis=None, combined_analysis=None):
     """Display analysis results in Streamlit UI"""
     if audio_analysis:
@@ -64,7 +123,7 @@ def display_cv_results(analysis):
     
     # Skills Radar Chart
     st.subheader("Skills Analysis")
-    fig = create_radar_chart(analysis['analysis'])
+    fig = create_radar_figure(analysis['analysis'])
     st.plotly_chart(fig, use_container_width=True)
     
     # Interview Questions
@@ -135,70 +194,232 @@ def main():
         )
         job_category = st.selectbox("Select Job Category", ["Data Engineer", "Data Analyst", "AI Engineer", "UI/UX Developer"])
         audio_enabled = st.checkbox("Include Interview Audio Analysis")
+        max_workers = st.slider("Parallel CV workers", 1, 16,
+                                int(st.secrets.get("MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+                                help="Match the Ollama server's OLLAMA_NUM_PARALLEL")
+        use_cache = st.checkbox("Reuse cached analyses", value=True,
+                                help="Untick to force a fresh Granite call for every CV")
+        stream_results = st.checkbox("Show partial results while analysing", value=True)
+        # Off by default, like ASR_VAD: VAD can clip quiet speech
+        skip_silence = st.checkbox("Skip silence in interview audio (VAD)",
+                                   value=env_flag("ASR_VAD", default=False),
+                                   disabled=not audio_enabled)
+        prescreen_enabled = st.checkbox("Keyword pre-screen before the LLM",
+                                        help="Rank the batch against the job category and "
+                                             "only analyse the best matches")
+        top_k = st.number_input("Analyse the top K CVs (0 = all)", min_value=0, value=0, step=1,
+                                disabled=not prescreen_enabled)
+        min_score = st.slider("Minimum pre-screen score", 0.0, 0.5, 0.0, 0.01,
+                              disabled=not prescreen_enabled)
+        dedup_enabled = st.checkbox("Link near-duplicate CVs", value=True,
+                                    help="Analyse one CV per group of near-identical uploads "
+                                         "and reuse its result for the others")
+    # Pre-screen and duplicate settings change which CVs get analysed, and unticking
+    # the cache asks for fresh analyses, so they are all part of the memo key
+    screen_key = (int(top_k) or None, min_score or None) if prescreen_enabled else None
+    if screen_key == (None, None):
+        screen_key = None
+    run_key = (screen_key, dedup_enabled, use_cache)
     
     st.header("CV Analysis Platform")
     uploaded_files = st.file_uploader("Upload Candidate CVs", type=["pdf", "docx"], accept_multiple_files=True)
 
     if audio_enabled:
         audio_file = st.file_uploader("Upload Interview Audio", type=["wav", "mp3"])
+        # Load and warm the shared Whisper model while the user is still uploading
+        with st.spinner("Loading speech model..."):
+            load_processor()
     else:
         audio_file = None
 
+    file_ids = [file_identity(f) for f in uploaded_files or []]
+    memo = prune_session_results(set(file_ids))
+
     if uploaded_files:
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = session_temp_dir()
         analysis_results = []
         errors = []
 
-        for idx, file in enumerate(uploaded_files):
-            try:
-                with st.expander(f"Processing {file.name}", expanded=DEBUG):
-                    # Save file
-                    file_path = save_uploaded_file(file, temp_dir)
-                    if DEBUG: st.write(f"Saved to: {file_path}")
-                    print(file_path)
-                    # Extract text
-
-                    # Process CV
-                    result = process_cv(file_path, job_category)
-                    print("result", result)
-                    if DEBUG: st.json(result)
-
-                    if audio_enabled:
-                        print("Audio analysis enabled")
-                    else:
-                    # Generate report
-                        pdf_path = generate_pdf_report(result, temp_dir)
-                        analysis_results.append((result, pdf_path))
-                    
-            except Exception as e:
-                base_name = os.path.basename(file_path) if file_path else file.name
-                error_msg = f"{base_name[:30]}: {str(e)}"
-                errors.append(error_msg)
-                if DEBUG:
-                    st.error(f"Processing Error: {error_msg}")
-                    st.code(f"Error details: {traceback.format_exc()[-500:]}")
+        # Only files not already analysed for this job category in this session
+        new_indices = [i for i, fid in enumerate(file_ids) if (fid, job_category, run_key) not in memo]
+        if screen_key and new_indices:
+            # Top-K ranks the whole upload, so a new file re-screens the batch;
+            # files analysed before come back from the caches and job store
+            new_indices = list(range(len(file_ids)))
+        new_files = [uploaded_files[i] for i in new_indices]
+
+        if new_files:
+            progress = st.progress(0.0, text=f"Processing 0/{len(new_files)} CVs")
+            status_slots = [st.empty() for _ in new_files]
+            for idx, file in enumerate(new_files):
+                status_slots[idx].write(f"⏳ {file.name}")
+        done = 0
+        partial = [{} for _ in new_files]
 
+        def on_field(idx, key, value):
+            partial[idx][key] = value
+            fields = partial[idx]
+            lines = [f"⏳ {new_files[idx].name}"]
+            if "name" in fields:
+                lines[0] += f" — **{fields['name']}**"
+            if "analysis" in fields:
+                scores = [v for v in fields["analysis"].values() if isinstance(v, (int, float))]
+                if scores:
+                    lines.append(f"Average score: {sum(scores)/len(scores):.2f}/5")
+            if "summary" in fields:
+                lines.append(f"_{fields['summary']}_")
+            status_slots[idx].markdown("  \n".join(lines))
 
-        if audio_file:
+        def on_progress(idx, outcome):
+            nonlocal done
+            done += 1
+            progress.progress(done / len(new_files),
+                              text=f"Processing {done}/{len(new_files)} CVs")
+            if outcome["error"]:
+                status_slots[idx].write(f"❌ {outcome['name']}")
+            elif outcome.get("duplicate_of"):
+                status_slots[idx].write(f"🔗 {outcome['name']} (near-duplicate of "
+                                        f"{outcome['duplicate_of']['name']})")
+            elif outcome.get("skipped"):
+                status_slots[idx].write(f"⏭️ {outcome['name']} "
+                                        f"(pre-screen score {outcome['prescreen']['score']:.2f})")
+            else:
+                status_slots[idx].write(f"✅ {outcome['name']}")
+
+        def run_new_files():
+            if not new_files:
+                return []
+            return process_batch(
+                new_files, temp_dir, job_category,
+                max_workers=max_workers,
+                build_report=not audio_enabled,
+                use_cache=use_cache,
+                on_progress=on_progress,
+                on_field=on_field if stream_results else None,
+                job_store=load_job_store(),
+                report_mode=REPORT_POOL,
+                top_k=screen_key[0] if screen_key else None,
+                min_score=screen_key[1] if screen_key else None,
+                dedup_index=load_dedup_index() if dedup_enabled else None
+            )
+
+        processor = load_processor() if audio_file else None
+        audio_analysis = None
+        audio_timings = {}
+        # The interview is analysed once per recording and options, not on every rerun
+        audio_key = (file_identity(audio_file), job_category, skip_silence) if audio_file else None
+        audio_memo = st.session_state.get("audio_outcome")
+        if processor is not None and audio_memo and audio_memo[0] == audio_key:
+            _, audio_analysis, audio_timings = audio_memo
+            new_outcomes = run_new_files()
+        elif processor is not None:
+            # Transcribe the interview while the CVs are being analysed
+            with st.spinner("Processing audio alongside the CVs (this may take a few minutes)..."):
+                new_outcomes, audio_analysis, audio_timings = overlap_with_audio(
+                    run_new_files, processor, audio_file, job_category, vad=skip_silence
+                )
+            if audio_analysis:
+                st.session_state["audio_outcome"] = (audio_key, audio_analysis, audio_timings)
+        else:
+            new_outcomes = run_new_files()
+        fresh = dict(zip(new_indices, new_outcomes))
+        for i, outcome in fresh.items():
+            # Failures are shown once and retried on the next run, not memoized
+            if not outcome["error"]:
+                memo[(file_ids[i], job_category, run_key)] = outcome
+
+        outcomes = [fresh[i] if i in fresh else memo[(fid, job_category, run_key)]
+                    for i, fid in enumerate(file_ids)]
+        linked = sum(1 for o in outcomes if o.get("duplicate_of"))
+        if linked:
+            st.info(f"Linked {linked} near-duplicate CV(s) to an already analysed copy")
+        if screen_key:
+            summary = prescreen_summary(outcomes)
+            saved = summary["estimated_llm_seconds_saved"]
+            st.info(f"Pre-screen: analysed {summary['analysed']} of {summary['screened']} CVs, "
+                    f"skipped {summary['skipped']}"
+                    + (f" (~{saved:.0f}s of LLM time saved)" if saved else ""))
+
+        if not audio_enabled:
+            # Reports are skipped while audio is enabled; build them when it is switched off
+            # Only report paths are kept in the session; the PDFs live in its temp dir.
+            # Duplicates of a CV in this batch share its report; archived ones need their own.
+            missing = [o for o in outcomes
+                       if o["result"] and not (o["pdf_path"] and os.path.exists(o["pdf_path"]))
+                       and (not o.get("duplicate_of") or o["duplicate_of"].get("archived"))]
+            if missing:
+                rendered = get_report_pool(report_workers(max_workers)).render_many(
+                    [(o["result"], None) for o in missing], output_dir=temp_dir)
+                for outcome, pdf_path in zip(missing, rendered):
+                    outcome["pdf_path"] = pdf_path
+
+        result = None
+        for outcome in outcomes:
+            with st.expander(f"Processing {outcome['name']}", expanded=DEBUG):
+                if DEBUG: st.write(f"Saved to: {outcome['file_path']}")
+                if outcome.get("prescreen"):
+                    screen = outcome["prescreen"]
+                    st.caption(f"Pre-screen score {screen['score']:.2f} (rank {screen['rank']}); "
+                               f"matched: {', '.join(screen['matched']) or 'nothing'}")
+                if outcome["error"]:
+                    errors.append(outcome["error"])
+                    if DEBUG:
+                        st.error(f"Processing Error: {outcome['error']}")
+                        st.code(f"Error details: {outcome.get('traceback', '')[-500:]}")
+                    continue
+                if outcome.get("skipped"):
+                    st.write("Skipped by the keyword pre-screen")
+                    continue
+                if outcome.get("duplicate_of"):
+                    link = outcome["duplicate_of"]
+                    st.write(f"Near-duplicate of {link['name']} (similarity {link['similarity']:.0%}); "
+                             f"its analysis is reused")
+                    if not link.get("archived"):
+                        continue  # the representative's result is listed with it
+
+                result = outcome["result"]
+                if DEBUG: st.json(result)
+
+                if audio_enabled:
+                    print("Audio analysis enabled")
+                else:
+                    analysis_results.append((result, outcome["pdf_path"]))
+
+        if audio_file and result:
             try:
-                processor = AudioProcessor("base")  # or "small", "tiny"
-                
-                with st.spinner("Processing audio (this may take a few minutes)..."):
-                    transcript = processor.process_audio(audio_file, job_category)
-                    
-                    if transcript:
-                        st.success("Audio transcription successful!")
-                        st.text_area("Transcript", transcript, height=200)
-                        pdf_path = generate_pdf_report_with_audio(result, transcript, temp_dir)
-                        analysis_results.append((result, pdf_path))
-                        # Continue with your analysis...
-                    else:
-                        st.error("Failed to transcribe audio - please check the file format")
+                if processor is None:
+                    raise RuntimeError("Audio processor is not available")
+
+                if audio_analysis:
+                    st.success("Audio transcription successful!")
+                    stats = audio_timings.get("asr")
+                    if stats:
+                        if stats.get("cache_hit"):
+                            st.caption(f"Reused cached transcript of {stats['duration']}s of audio")
+                        else:
+                            st.caption(f"Transcribed {stats['duration']}s of audio in {stats['elapsed']}s "
+                                       f"with {stats['backend']} "
+                                       f"(real-time factor {stats['rtf']})")
+                        if stats.get("vad"):
+                            st.caption(f"Skipped {stats['vad']['skipped_seconds']}s of silence "
+                                       f"({stats['vad']['skipped_ratio']:.0%} of the recording)")
+                    if DEBUG:
+                        st.caption(f"Overlapped timings: {audio_timings}")
+                    st.json(audio_analysis, expanded=False)
+                    pdf_path = get_report_pool(report_workers(max_workers)).render(
+                        result, audio_analysis, output_dir=temp_dir)
+                    analysis_results.append((result, pdf_path))
+                else:
+                    st.error("Failed to transcribe audio - please check the file format")
                         
             except Exception as e:
                 st.error(f"Audio processing error: {str(e)}")
                 st.info("Supported formats: MP3, WAV, M4A, FLAC")
                 
+        if DEBUG and st.button("Reprocess all CVs"):
+            memo.clear()
+            st.rerun()
+
         #display_results(result, audio_analysis, combined_analysis)
 
 
@@ -221,13 +442,33 @@ def main():
             
             # For multiple files
             if len(analysis_results) > 1:
-                combined_pdf = combine_pdfs([res[1] for res in analysis_results])
-                st.download_button(
-                    label="Download All Reports",
-                    data=combined_pdf,
-                    file_name="combined_reports.pdf",
-                    mime="application/pdf"
-                )    
+                # Report file names carry a content digest, so the paths identify the set
+                report_paths = tuple(res[1] for res in analysis_results)
+                combined = st.session_state.get("combined_pdf")
+                if not combined or combined[0] != report_paths or not os.path.exists(combined[1]):
+                    if combined and os.path.exists(combined[1]):
+                        os.unlink(combined[1])
+                    # Merged on disk with a bookmark per candidate
+                    combined = (report_paths, merge_reports(
+                        report_paths, titles=[res[0]['name'] for res in analysis_results],
+                        output_dir=temp_dir))
+                    st.session_state["combined_pdf"] = combined
+                # download_button reads the whole file into Streamlit's media store;
+                # keeping it on disk only avoids a second copy in session state
+                with open(combined[1], "rb") as f:
+                    st.download_button(
+                        label="Download All Reports",
+                        data=f,
+                        file_name="combined_reports.pdf",
+                        mime="application/pdf"
+                    )
+
+        if DEBUG:
+            st.caption(f"Extraction cache: {EXTRACTION_CACHE.stats()}")
+            st.caption(f"Analysis cache: {ANALYSIS_CACHE.stats()}")
+            if audio_enabled:
+                from model_registry import get_model_registry
+                st.caption(f"ASR models: {get_model_registry().metrics()}")
 
         if errors:
             st.error(f"Failed to process {len(errors)} CV(s)")
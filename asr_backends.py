@@ -0,0 +1,262 @@
+# asr_backends.py
+import os
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+WINDOW_SECONDS = 30  # Whisper's fixed input length
+
+DEFAULT_ASR_BACKEND = os.environ.get("ASR_BACKEND", "torch")
+
+
+def split_windows(audio: np.ndarray, chunk_seconds: float = WINDOW_SECONDS,
+                  overlap_seconds: float = 0.0,
+                  sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, np.ndarray]]:
+    """Split a recording into (start_seconds, samples) windows of at most chunk_seconds"""
+    if overlap_seconds >= chunk_seconds:
+        raise ValueError("overlap_seconds must be smaller than chunk_seconds")
+    size = int(chunk_seconds * sample_rate)
+    step = int((chunk_seconds - overlap_seconds) * sample_rate)
+    windows = []
+    for start in range(0, max(len(audio), 1), step):
+        windows.append((start / sample_rate, audio[start:start + size]))
+        if start + size >= len(audio):
+            break
+    return windows
+
+
+def stitch_text(previous: str, current: str, max_words: int = 20) -> str:
+    """Drop the start of current that repeats the end of previous (overlapping windows)"""
+    prev_words = previous.split()
+    cur_words = current.split()
+    normalise = lambda words: [w.strip(".,!?;:").lower() for w in words]
+    for n in range(min(max_words, len(prev_words), len(cur_words)), 0, -1):
+        if normalise(prev_words[-n:]) == normalise(cur_words[:n]):
+            return " ".join(cur_words[n:])
+    return current
+
+
+class ASRBackend(ABC):
+    """Speech-to-text engine behind AudioProcessor.
+
+    transcribe() takes 16 kHz mono float32 samples and returns
+    {"text": str, "segments": [{"start", "end", "text"}], "language": str}
+    regardless of the engine, so backends are interchangeable. Subclasses
+    implement load_model() and transcribe().
+    """
+
+    name = "base"
+
+    def __init__(self, model_size: str = "base", device: Optional[str] = None):
+        self.model_size = model_size
+        self.device = device or "cpu"
+        self._model = None
+
+    @property
+    def model(self):
+        """Lazy load model when first needed"""
+        if self._model is None:
+            self._model = self.load_model()
+        return self._model
+
+    @abstractmethod
+    def load_model(self):
+        """Load and return the engine's model"""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, chunk_seconds: float = WINDOW_SECONDS,
+                   overlap_seconds: float = 0.0, batch_size: int = 4) -> Dict[str, Any]:
+        """Transcribe one full recording"""
+
+    def transcribe_many(self, audios: List[np.ndarray], chunk_seconds: float = WINDOW_SECONDS,
+                        overlap_seconds: float = 0.0, batch_size: int = 4) -> List[Dict[str, Any]]:
+        """Transcribe several recordings; each result also carries asr_seconds.
+
+        The default runs them one by one; backends that can batch across
+        recordings override this.
+        """
+        results = []
+        for audio in audios:
+            start = time.perf_counter()
+            result = self.transcribe(audio, chunk_seconds, overlap_seconds, batch_size)
+            result["asr_seconds"] = round(time.perf_counter() - start, 3)
+            results.append(result)
+        return results
+
+    def options_key(self) -> str:
+        """Identifies everything that changes the transcript for this backend"""
+        return f"{self.name}:{self.model_size}"
+
+
+class WhisperTorchBackend(ASRBackend):
+    """openai-whisper on PyTorch; decodes 30 s windows in stacked batches"""
+
+    name = "torch"
+
+    def __init__(self, model_size: str = "base", device: Optional[str] = None):
+        import torch
+        super().__init__(model_size, device or ("cuda" if torch.cuda.is_available() else "cpu"))
+
+    def load_model(self):
+        import torch
+        import whisper
+        # Disable torch's class inspection during load
+        torch._C._disable_class_wrapper = True
+        try:
+            return whisper.load_model(self.model_size, device=self.device)
+        finally:
+            torch._C._disable_class_wrapper = False
+
+    def options_key(self) -> str:
+        # fp16 decoding on CUDA can change the transcript
+        return f"{self.name}:{self.model_size}:{'fp16' if self.device == 'cuda' else 'fp32'}"
+
+    def _mel(self, samples: np.ndarray):
+        import whisper
+        n_mels = getattr(self.model.dims, "n_mels", 80)
+        return whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), n_mels=n_mels)
+
+    def detect_language(self, audio: np.ndarray) -> str:
+        """Language of the first window of a recording"""
+        mel = self._mel(audio[:WINDOW_SECONDS * SAMPLE_RATE]).to(self.model.device)
+        _, probs = self.model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+    def transcribe_many(self, audios: List[np.ndarray], chunk_seconds: float = WINDOW_SECONDS,
+                        overlap_seconds: float = 0.0, batch_size: int = 4) -> List[Dict[str, Any]]:
+        """Decode 30 s windows from all recordings in shared batches.
+
+        Windows of every recording are pooled (grouped by detected language)
+        and stacked into one mel batch per whisper.decode call, so short files
+        fill batches that would otherwise be mostly padding. Batch time is
+        attributed to recordings by their share of windows in each batch.
+        """
+        import torch
+        import whisper
+
+        asr_seconds = [0.0] * len(audios)
+        languages = []
+        windows_per_file = []
+        by_language = defaultdict(list)  # language -> [(file_idx, window_idx, samples)]
+        for file_idx, audio in enumerate(audios):
+            start = time.perf_counter()
+            language = self.detect_language(audio)
+            asr_seconds[file_idx] += time.perf_counter() - start
+            languages.append(language)
+            windows = split_windows(audio, chunk_seconds, overlap_seconds)
+            windows_per_file.append(windows)
+            for window_idx, (_, samples) in enumerate(windows):
+                by_language[language].append((file_idx, window_idx, samples))
+
+        texts = [[""] * len(windows) for windows in windows_per_file]
+        for language, items in by_language.items():
+            options = whisper.DecodingOptions(fp16=self.device == "cuda", language=language,
+                                              without_timestamps=True)
+            for i in range(0, len(items), batch_size):
+                batch = items[i:i + batch_size]
+                start = time.perf_counter()
+                mel = torch.stack([self._mel(samples) for _, _, samples in batch]).to(self.model.device)
+                results = whisper.decode(self.model, mel, options)
+                share = (time.perf_counter() - start) / len(batch)
+                for (file_idx, window_idx, _), result in zip(batch, results):
+                    texts[file_idx][window_idx] = result.text.strip()
+                    asr_seconds[file_idx] += share
+
+        outputs = []
+        for file_idx, windows in enumerate(windows_per_file):
+            segments = []
+            full_text = ""
+            for (offset, samples), text in zip(windows, texts[file_idx]):
+                if overlap_seconds and full_text:
+                    text = stitch_text(full_text, text)
+                if not text:
+                    continue
+                segments.append({
+                    "start": round(offset, 2),
+                    "end": round(offset + len(samples) / SAMPLE_RATE, 2),
+                    "text": text,
+                })
+                full_text = f"{full_text} {text}".strip()
+            outputs.append({
+                "text": full_text,
+                "segments": segments,
+                "language": languages[file_idx],
+                "asr_seconds": round(asr_seconds[file_idx], 3),
+            })
+        return outputs
+
+    def transcribe(self, audio: np.ndarray, chunk_seconds: float = WINDOW_SECONDS,
+                   overlap_seconds: float = 0.0, batch_size: int = 4) -> Dict[str, Any]:
+        result = self.transcribe_many([audio], chunk_seconds, overlap_seconds, batch_size)[0]
+        result.pop("asr_seconds", None)
+        return result
+
+
+class CTranslate2Backend(ASRBackend):
+    """faster-whisper (CTranslate2) with int8 weights; several times faster on CPU.
+
+    Installed alongside whisper-ctranslate2. Long-form segmentation is done by
+    the engine itself; batch_size is used when BatchedInferencePipeline exists.
+    """
+
+    name = "ctranslate2"
+
+    def __init__(self, model_size: str = "base", device: Optional[str] = None,
+                 compute_type: str = os.environ.get("ASR_COMPUTE_TYPE", "int8"),
+                 cpu_threads: int = int(os.environ.get("ASR_CPU_THREADS", "0")),
+                 beam_size: int = 1):
+        super().__init__(model_size, device or "cpu")
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads or (os.cpu_count() or 4)
+        self.beam_size = beam_size
+
+    def load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.model_size, device=self.device,
+                            compute_type=self.compute_type, cpu_threads=self.cpu_threads)
+
+    def options_key(self) -> str:
+        return f"{self.name}:{self.model_size}:{self.compute_type}:beam{self.beam_size}"
+
+    def transcribe(self, audio: np.ndarray, chunk_seconds: float = WINDOW_SECONDS,
+                   overlap_seconds: float = 0.0, batch_size: int = 4) -> Dict[str, Any]:
+        audio = audio.astype(np.float32, copy=False)
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            pipeline = BatchedInferencePipeline(model=self.model)
+            segments_iter, info = pipeline.transcribe(audio, beam_size=self.beam_size,
+                                                      batch_size=batch_size)
+        except ImportError:
+            segments_iter, info = self.model.transcribe(audio, beam_size=self.beam_size)
+
+        segments = [
+            {"start": round(seg.start, 2), "end": round(seg.end, 2), "text": seg.text.strip()}
+            for seg in segments_iter
+            if seg.text.strip()
+        ]
+        return {
+            "text": " ".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+
+ASR_BACKENDS = {
+    WhisperTorchBackend.name: WhisperTorchBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+
+def create_backend(name: Optional[str] = None, model_size: str = "base", **options) -> ASRBackend:
+    """Instantiate a backend by name ('torch' or 'ctranslate2')"""
+    name = (name or DEFAULT_ASR_BACKEND).lower()
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend: {name}. Available: {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[name](model_size, **options)
@@ -1,53 +1,116 @@
-import torch
-import whisper
 import tempfile
 import numpy as np
 import os
+import time
+import hashlib
+import logging
 import subprocess
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from analysis_prompt import AUDIO_ANALYSIS_PROMPT
 from cv_processor import analyze_audio_with_granite
+from asr_backends import ASRBackend, create_backend, SAMPLE_RATE, WINDOW_SECONDS
+from model_registry import get_model_registry
+from utils.cache import DiskCache, make_cache_key, env_flag
+from vad import apply_vad, remap_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Transcripts keyed by decoded audio + backend/model + decoding options.
+# Set ASR_TRANSCRIPT_CACHE=off to bypass.
+TRANSCRIPT_CACHE = DiskCache(
+    "transcripts",
+    max_bytes=int(os.environ.get("ASR_TRANSCRIPT_CACHE_MAX_BYTES", 200 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("ASR_TRANSCRIPT_CACHE_TTL", 30 * 24 * 3600)),
+    enabled=env_flag("ASR_TRANSCRIPT_CACHE")
+)
+
+
+def audio_fingerprint(audio: np.ndarray) -> str:
+    """SHA-256 of the decoded PCM, independent of container format and file name"""
+    return hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32).tobytes()).hexdigest()
+
+
+def decode_audio_bytes(data, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an in-memory audio file to mono float32 PCM without touching disk.
+
+    The bytes are piped into ffmpeg's stdin and 16-bit PCM is read back from
+    stdout, mirroring whisper.load_audio.
+    """
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "pipe:1"
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
 
 class AudioProcessor:
-    def __init__(self, model_size: str = "base"):
-        """Initialize with lazy loading"""
+    def __init__(self, model_size: str = "base", backend: Optional[str] = None,
+                 vad: bool = env_flag("ASR_VAD", default=False),
+                 **backend_options):
+        """Initialize with lazy loading.
+
+        backend selects the ASR engine ('torch' or 'ctranslate2'); defaults to
+        the ASR_BACKEND environment variable. vad drops silence before decoding.
+        """
         self.model_size = model_size
-        self._model = None  # Lazy load later
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.vad = vad
+        self.backend_name = backend
+        self.backend_options = backend_options
+        self.last_language = None
+        self._options_key: Optional[str] = None
         
     def load_audio(self, audio_file) -> Optional[np.ndarray]:
-        """Safely load audio from Streamlit UploadedFile"""
+        """Safely load audio from Streamlit UploadedFile.
+
+        Decodes straight from memory; formats ffmpeg cannot read from a pipe
+        (e.g. MP4/M4A with the index at the end) fall back to a temp file.
+        """
         try:
-            # Create temp file with proper extension
-            suffix = os.path.splitext(audio_file.name)[1]
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-                tmp.write(audio_file.getbuffer())
-                tmp_path = tmp.name
-            
-            # Load audio using Whisper's built-in loader
-            audio = whisper.load_audio(tmp_path)
-            
-            # Clean up temp file
-            os.unlink(tmp_path)
-            
-            return audio
+            try:
+                return decode_audio_bytes(audio_file.getbuffer())
+            except RuntimeError as e:
+                logger.info(f"In-memory decode failed, retrying from temp file: {str(e)[:200]}")
+
+            tmp_path = self._save_temp_audio(audio_file)
+            if not tmp_path:
+                return None
+            try:
+                # Load audio using Whisper's built-in loader
+                import whisper
+                return whisper.load_audio(tmp_path)
+            finally:
+                os.unlink(tmp_path)
             
         except Exception as e:
-            print(f"Audio loading failed: {str(e)}")
+            logger.error(f"Audio loading failed: {str(e)}")
             return None
 
 
+    @property
+    def backend(self) -> ASRBackend:
+        """Shared, warmed-up backend from the process-wide model registry"""
+        return get_model_registry().get_backend(self.backend_name, self.model_size,
+                                                **self.backend_options)
+
     @property
     def model(self):
         """Lazy load model when first needed"""
-        if self._model is None:
-            # Disable torch's class inspection during load
-            torch._C._disable_class_wrapper = True
-            try:
-                self._model = whisper.load_model(self.model_size, device=self.device)
-            finally:
-                torch._C._disable_class_wrapper = False
-        return self._model
+        return self.backend.model
+
+    @property
+    def device(self) -> str:
+        return self.backend.device
+
+    def warm_up(self) -> None:
+        """Load and warm the model now instead of on the first upload"""
+        self.backend
 
     def convert_to_wav(self, input_path: str, output_path: str):
         """Convert any audio format to WAV using ffmpeg"""
@@ -72,50 +135,181 @@ class AudioProcessor:
                 tmp.write(audio_file.getbuffer())
                 return tmp.name
         except Exception as e:
-            print(f"Temp file creation failed: {str(e)}")
+            logger.error(f"Temp file creation failed: {str(e)}")
             return None
 
-    def transcribe(self, audio_file) -> Optional[str]:
-        """Complete transcription pipeline with proper file handling"""
-        temp_path = None
+    def options_key(self) -> str:
+        """The backend's options_key(), from an unloaded instance so cache hits never load a model"""
+        if self._options_key is None:
+            self._options_key = create_backend(self.backend_name, self.model_size,
+                                               **self.backend_options).options_key()
+        return self._options_key
+
+    def _transcript_cache_key(self, audio: np.ndarray, chunk_seconds: float,
+                              overlap_seconds: float, use_vad: bool) -> str:
+        return make_cache_key(audio_fingerprint(audio), self.options_key(),
+                              chunk_seconds, overlap_seconds, use_vad)
+
+    def transcribe_arrays(self, audios: List[np.ndarray], chunk_seconds: float = WINDOW_SECONDS,
+                          overlap_seconds: float = 0.0, batch_size: int = 4,
+                          vad: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Transcribe decoded recordings, batching windows across them.
+
+        Each result has the backend transcript (text, timestamped segments,
+        language) plus stats: rtf (real-time factor) is processing time divided
+        by audio duration, so 0.25 means one hour of audio takes 15 minutes.
+        Cached transcripts are returned without touching the model; with vad,
+        only detected speech is decoded and timestamps are mapped back onto
+        the original recording.
+        """
+        use_vad = self.vad if vad is None else vad
+        results: List[Optional[Dict[str, Any]]] = [None] * len(audios)
+        keys = []
+        pending = []  # (index, audio to decode, spans, vad stats, prep seconds)
+
+        for idx, audio in enumerate(audios):
+            start = time.perf_counter()
+            key = self._transcript_cache_key(audio, chunk_seconds, overlap_seconds, use_vad)
+            keys.append(key)
+            cached = TRANSCRIPT_CACHE.get(key)
+            if cached is not None:
+                logger.debug(f"Transcript cache hit: {key[:12]}")
+                cached["cache_hit"] = True
+                results[idx] = cached
+                continue
+
+            spans, vad_stats = None, None
+            if use_vad:
+                audio, spans, vad_stats = apply_vad(audio)
+                logger.info(f"VAD skipped {vad_stats['skipped_seconds']}s of "
+                            f"{vad_stats['audio_seconds']}s ({vad_stats['skipped_ratio']:.0%})")
+            pending.append((idx, audio, spans, vad_stats, time.perf_counter() - start))
+
+        if pending:
+            backend = self.backend
+            to_decode = [p for p in pending if len(p[1])]
+            decoded = backend.transcribe_many([p[1] for p in to_decode],
+                                              chunk_seconds, overlap_seconds, batch_size)
+            by_index = {p[0]: r for p, r in zip(to_decode, decoded)}
+
+            for idx, audio, spans, vad_stats, prep_seconds in pending:
+                result = by_index.get(idx, {"text": "", "segments": [], "language": None,
+                                            "asr_seconds": 0.0})
+                if spans is not None:
+                    for segment in result["segments"]:
+                        segment["start"] = remap_timestamp(segment["start"], spans)
+                        segment["end"] = remap_timestamp(segment["end"], spans)
+
+                duration = len(audios[idx]) / SAMPLE_RATE
+                elapsed = prep_seconds + result.pop("asr_seconds", 0.0)
+                result.update({
+                    "vad": vad_stats,
+                    "backend": backend.name,
+                    "duration": round(duration, 2),
+                    "elapsed": round(elapsed, 2),
+                    "rtf": round(elapsed / duration, 3) if duration else None,
+                    "cache_hit": False,
+                })
+                TRANSCRIPT_CACHE.set(keys[idx], result)
+                results[idx] = result
+
+        if results:
+            self.last_language = results[-1].get("language")
+        return results
+
+    def transcribe_chunked(self, audio: np.ndarray, chunk_seconds: float = WINDOW_SECONDS,
+                           overlap_seconds: float = 0.0, batch_size: int = 4,
+                           vad: Optional[bool] = None) -> Dict[str, Any]:
+        """Transcribe one full recording (see transcribe_arrays)"""
+        return self.transcribe_arrays([audio], chunk_seconds, overlap_seconds, batch_size, vad)[0]
+
+    def transcribe_batch(self, audio_files, batch_size: int = 8,
+                         chunk_seconds: float = WINDOW_SECONDS, overlap_seconds: float = 0.0,
+                         vad: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Transcribe many uploaded recordings with windows batched across files.
+
+        Files are decoded and transcribed batch_size at a time, so only one
+        group of decoded recordings is held in memory. Returns one dict per
+        file, in input order, with the transcript, name, decode_seconds
+        (ffmpeg), elapsed (VAD + ASR share) and rtf; files that fail to decode
+        get an error entry instead.
+        """
+        start = time.perf_counter()
+        outputs: List[Optional[Dict[str, Any]]] = [None] * len(audio_files)
+        for group_start in range(0, len(audio_files), max(1, batch_size)):
+            decoded = []
+            for idx in range(group_start, min(group_start + max(1, batch_size), len(audio_files))):
+                audio_file = audio_files[idx]
+                decode_start = time.perf_counter()
+                audio = self.load_audio(audio_file)
+                decode_seconds = round(time.perf_counter() - decode_start, 3)
+                if audio is None:
+                    outputs[idx] = {"name": audio_file.name, "error": "Could not decode audio",
+                                    "decode_seconds": decode_seconds}
+                else:
+                    decoded.append((idx, audio_file.name, audio, decode_seconds))
+
+            results = self.transcribe_arrays([d[2] for d in decoded], chunk_seconds,
+                                             overlap_seconds, batch_size, vad)
+            for (idx, name, _, decode_seconds), result in zip(decoded, results):
+                outputs[idx] = dict(result, name=name, decode_seconds=decode_seconds, error=None)
+
+        total = time.perf_counter() - start
+        audio_seconds = sum(r.get("duration", 0) for r in outputs if r)
+        logger.info(f"Batch transcribed {len(audio_files)} files ({audio_seconds:.0f}s of audio) "
+                    f"in {total:.1f}s (RTF {total / audio_seconds if audio_seconds else 0:.3f})")
+        return outputs
+
+    def transcribe_with_stats(self, audio_file, chunked: bool = True,
+                              chunk_seconds: float = WINDOW_SECONDS, overlap_seconds: float = 0.0,
+                              batch_size: int = 4, vad: Optional[bool] = None
+                              ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Complete transcription pipeline with proper file handling.
+
+        Returns (transcript or None, stats of this run). The processor is
+        shared across sessions, so stats come back with the call rather than
+        being kept on it. chunked=False keeps the old behaviour of decoding
+        only the first 30 s (no stats).
+        """
         try:
-            # 1. Save to properly named temp file
-            temp_path = self._save_temp_audio(audio_file)
-            if not temp_path:
-                return None
-                
-            # 2. Load audio using Whisper's loader
-            audio = whisper.load_audio(temp_path)
-            audio = whisper.pad_or_trim(audio)
-            
-            # 3. Process audio
-            mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
-            _, probs = self.model.detect_language(mel)
-            lang = max(probs, key=probs.get)
-            options = whisper.DecodingOptions(fp16=False)
-            result = whisper.decode(self.model, mel, options)
-            
-            return result.text
+            # 1. Decode the upload in memory (16 kHz mono float32)
+            audio = self.load_audio(audio_file)
+            if audio is None:
+                return None, {}
+
+            if chunked:
+                result = self.transcribe_chunked(audio, chunk_seconds, overlap_seconds, batch_size, vad)
+                logger.info(f"Transcribed {result['duration']}s of audio in {result['elapsed']}s "
+                            f"(RTF {result['rtf']})")
+                return result["text"], {k: v for k, v in result.items() if k != "text"}
+
+            # Only the first window, as before chunking existed
+            result = self.backend.transcribe(audio[:WINDOW_SECONDS * SAMPLE_RATE])
+            return result["text"], {}
             
         except Exception as e:
-            print(f"Transcription failed: {str(e)}")
-            return None
-            
-        finally:
-            # Clean up temp file
-            if temp_path and os.path.exists(temp_path):
-                os.unlink(temp_path)
-                
-               
-    def process_audio(self, audio_file, job_category: str) -> Optional[dict]:
-        """Full processing pipeline"""
+            logger.error(f"Transcription failed: {str(e)}")
+            return None, {}
+
+    def transcribe(self, audio_file, **transcribe_options) -> Optional[str]:
+        """Transcript only (see transcribe_with_stats)"""
+        return self.transcribe_with_stats(audio_file, **transcribe_options)[0]
+
+    def process_audio_with_stats(self, audio_file, job_category: str,
+                                 **transcribe_options) -> Tuple[Optional[dict], Dict[str, Any]]:
+        """Full processing pipeline; returns (analysis or None, transcription stats)"""
+        stats: Dict[str, Any] = {}
         try:
-            transcript = self.transcribe(audio_file)
-            if not transcript.strip():
+            transcript, stats = self.transcribe_with_stats(audio_file, **transcribe_options)
+            if not transcript or not transcript.strip():
                 raise ValueError("Empty transcription result")
                 
-            return analyze_audio_with_granite(transcript, AUDIO_ANALYSIS_PROMPT, job_category)
+            return analyze_audio_with_granite(transcript, AUDIO_ANALYSIS_PROMPT, job_category), stats
             
         except Exception as e:
-            print(f"Audio processing error: {str(e)}")
-            return None
\ No newline at end of file
+            logger.error(f"Audio processing error: {str(e)}")
+            return None, stats
+
+    def process_audio(self, audio_file, job_category: str, **transcribe_options) -> Optional[dict]:
+        """Full processing pipeline"""
+        return self.process_audio_with_stats(audio_file, job_category, **transcribe_options)[0]
\ No newline at end of file
@@ -0,0 +1,95 @@
+# benchmark_startup.py
+"""Import-time budget of the CV-only path: python benchmark_startup.py [--budget-ms 1500]"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+# What the CV-only path (app start-up, cli.py) pulls in
+CV_MODULES = ["pipeline", "cv_processor", "report_generator", "job_store", "utils"]
+# Must not be imported until audio or a chart is actually used
+HEAVY_MODULES = ["torch", "whisper", "faster_whisper", "plotly", "kaleido"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run_probe(probe: str) -> subprocess.CompletedProcess:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr.strip()[-2000:]}")
+    return proc
+
+
+def _top_level_imports(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds of each depth-1 import in -X importtime output"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # A single space of indent marks a direct import
+        if match and len(match.group(3)) == 1:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def measure(modules: List[str]) -> Tuple[Dict[str, int], List[str]]:
+    """Import modules in a fresh interpreter with -X importtime.
+
+    Returns (cumulative microseconds per top-level import, heavy modules that
+    ended up in sys.modules). Imports done by a bare interpreter (site,
+    encodings, ...) are left out.
+    """
+    statements = "; ".join(f"import {name}" for name in modules)
+    probe = (f"import sys, json; {statements}; "
+             f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    baseline = _top_level_imports(_run_probe("import sys, json").stderr)
+    proc = _run_probe(probe)
+    cumulative = {name: us for name, us in _top_level_imports(proc.stderr).items()
+                  if name not in baseline}
+    return cumulative, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", action="append", dest="modules",
+                        help="Module to import (repeatable; default: the CV-only path)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to run (best one is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit non-zero when the total import time exceeds this")
+    args = parser.parse_args(argv)
+    modules = args.modules or CV_MODULES
+
+    totals = []
+    per_module: Dict[str, List[int]] = {}
+    heavy_loaded = set()
+    for _ in range(max(1, args.runs)):
+        cumulative, heavy = measure(modules)
+        totals.append(sum(cumulative.values()) / 1000)
+        heavy_loaded.update(heavy)
+        for name, us in cumulative.items():
+            per_module.setdefault(name, []).append(us)
+
+    total_ms = min(totals)  # best run: least disturbed by disk cache / scheduling
+    print(f"Imported {', '.join(modules)} in {total_ms:.0f} ms "
+          f"(best of {len(totals)}, worst {max(totals):.0f} ms)")
+    heaviest = sorted(per_module.items(), key=lambda item: -min(item[1]))[:args.top]
+    for name, samples in heaviest:
+        print(f"  {min(samples) / 1000:8.1f} ms  {name}")
+
+    status = 0
+    if heavy_loaded:
+        print(f"Heavy modules imported eagerly: {', '.join(sorted(heavy_loaded))}")
+        status = 1
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Over budget: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# cli.py
+"""Headless batch screening: python cli.py <dir|glob> --job-category "Data Engineer" -o out/"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import logging
+from typing import List, Set
+
+from pipeline import process_batch, prescreen_summary, DEFAULT_MAX_WORKERS, REPORT_POOL
+from cv_processor import ANALYSIS_CACHE
+from job_store import JobStore
+from dedup import DuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+JOB_CATEGORIES = ["Data Engineer", "Data Analyst", "AI Engineer", "UI/UX Developer"]
+
+
+def collect_inputs(patterns: List[str]) -> List[str]:
+    """Expand directories (recursively) and glob patterns into a sorted list of CV paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def recorded_files(results_path: str, job_category: str) -> Set[str]:
+    """Files that already have a record for job_category in results.jsonl"""
+    recorded = set()
+    if not os.path.exists(results_path):
+        return recorded
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if record.get("job_category") == job_category:
+                recorded.add(record.get("file"))
+    return recorded
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch CV screening without the Streamlit UI")
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of PDF/DOCX files")
+    parser.add_argument("-j", "--job-category", required=True, choices=JOB_CATEGORIES)
+    parser.add_argument("-o", "--output", default="cv_results", help="Output directory")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Concurrent CVs (match OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--no-reports", action="store_true", help="Skip PDF report generation")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    parser.add_argument("--job-db", help="SQLite job store (default: <output>/jobs.sqlite3); "
+                                         "re-running skips completed files and retries failed ones")
+    parser.add_argument("--no-resume", action="store_true", help="Do not record or reuse job state")
+    parser.add_argument("--dedup-db", help="Near-duplicate index (default: <output>/near_duplicates.sqlite3)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Analyse near-duplicate CVs separately instead of linking them")
+    parser.add_argument("--top-k", type=int, help="Keyword pre-screen: only analyse the K best-matching CVs")
+    parser.add_argument("--min-score", type=float,
+                        help="Keyword pre-screen: only analyse CVs scoring at least this (0-1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No PDF/DOCX files matched", file=sys.stderr)
+        return 1
+
+    reports_dir = os.path.join(args.output, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    results_path = os.path.join(args.output, "results.jsonl")
+    job_store = None
+    if not args.no_resume:
+        job_store = JobStore(args.job_db or os.path.join(args.output, "jobs.sqlite3"))
+    dedup_index = None
+    if not args.no_dedup:
+        dedup_index = DuplicateIndex(args.dedup_db or os.path.join(args.output, "near_duplicates.sqlite3"))
+
+    done = 0
+    failed = 0
+    resumed = 0
+    skipped = 0
+    linked = 0
+    # A resumed job only needs no new record if an earlier run got as far as writing one
+    recorded = recorded_files(results_path, args.job_category)
+    start = time.perf_counter()
+
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        def on_progress(idx, outcome):
+            nonlocal done, failed, resumed, skipped, linked
+            done += 1
+            if outcome.get("duplicate_of"):
+                linked += 1
+            if outcome["error"]:
+                failed += 1
+            if outcome.get("skipped"):
+                skipped += 1
+            if outcome.get("resumed"):
+                resumed += 1
+                if files[idx] in recorded:
+                    return  # already written to results.jsonl by the earlier run
+            record = {
+                "file": files[idx],
+                "job_category": args.job_category,
+                "result": outcome["result"],
+                "report": outcome["pdf_path"],
+                "error": outcome["error"],
+                "error_detail": outcome.get("error_detail"),
+                "skipped": outcome.get("skipped", False),
+                "prescreen": outcome.get("prescreen"),
+                "duplicate_of": outcome.get("duplicate_of"),
+            }
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+            elapsed = time.perf_counter() - start
+            if outcome["error"]:
+                status = "FAILED"
+            elif outcome.get("skipped"):
+                status = "skipped"
+            elif outcome.get("duplicate_of"):
+                status = f"duplicate of {outcome['duplicate_of']['name']}"
+            else:
+                status = "ok"
+            logger.info(f"[{done}/{len(files)}] {os.path.basename(files[idx])} {status} "
+                        f"({done / elapsed:.2f} CV/s)")
+
+        outcomes = process_batch(
+            files, reports_dir, args.job_category,
+            max_workers=args.workers,
+            build_report=not args.no_reports,
+            use_cache=not args.no_cache,
+            on_progress=on_progress,
+            job_store=job_store,
+            report_mode=REPORT_POOL,
+            top_k=args.top_k,
+            min_score=args.min_score,
+            dedup_index=dedup_index
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"\nProcessed {done} CVs in {elapsed:.1f}s with {args.workers} workers")
+    print(f"  succeeded:  {done - failed - skipped}")
+    print(f"  failed:     {failed}")
+    print(f"  resumed:    {resumed} (completed by an earlier run)")
+    if dedup_index is not None:
+        print(f"  linked:     {linked} near-duplicates ({dedup_index.count()} CVs indexed)")
+        dedup_index.close()
+    if args.top_k is not None or args.min_score is not None:
+        summary = prescreen_summary(outcomes)
+        saved = summary["estimated_llm_seconds_saved"]
+        print(f"  skipped:    {skipped} by the pre-screen"
+              + (f" (~{saved:.0f}s of LLM time saved)" if saved is not None else ""))
+    print(f"  throughput: {done / elapsed * 60:.1f} CVs/min")
+    print(f"  latency:    {elapsed / max(done, 1):.2f}s per CV (wall clock)")
+    print(f"  cache:      {ANALYSIS_CACHE.stats()}")
+    print(f"  results:    {results_path}")
+    if job_store is not None:
+        print(f"  job store:  {job_store.db_path} {job_store.counts(args.job_category)}")
+        job_store.close()
+    return 0 if failed == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,107 +1,207 @@
 # cv_processor.py
+import os
 import json
 import logging
-import requests
-from typing import Dict, Any
-from utils.file_handlers import extract_cv_text
+from typing import Dict, Any, Callable, Optional
+from utils.file_handlers import extract_cv_text, file_sha256
+from utils.cache import DiskCache, make_cache_key, env_flag
+from utils.extraction_pool import get_extraction_pool
 from analysis_prompt import ANALYSIS_PROMPT, AUDIO_ANALYSIS_PROMPT
+from ollama_client import OllamaClient, get_ollama_client
+from utils.json_stream import IncrementalJSONParser, SchemaMismatch
 from json import JSONDecodeError
 
 logger = logging.getLogger(__name__)
 
-def analyze_with_granite(cv_text: str, prompt_template: str, job_category: str) -> Dict[str, Any]:
-    """Handle Ollama's nested JSON response format"""
+# Only this much CV text is sent to the model, so extraction stops there too
+CV_TEXT_BUDGET = 3000
+
+# Interview transcripts run much longer than CVs (~1000 characters per spoken
+# minute) and get their own budget; raise it with the server's num_ctx
+TRANSCRIPT_TEXT_BUDGET = int(os.environ.get("CV_TRANSCRIPT_BUDGET", "12000"))
+
+# Run PDF/DOCX parsing in killable worker processes (CV_EXTRACTION_ISOLATION=off to disable)
+EXTRACTION_ISOLATION = env_flag("CV_EXTRACTION_ISOLATION")
+
+# Analysis results keyed by (CV text, job category, prompt, model).
+# Set CV_ANALYSIS_CACHE=off to bypass.
+ANALYSIS_CACHE = DiskCache(
+    "analysis",
+    max_bytes=int(os.environ.get("CV_ANALYSIS_CACHE_MAX_BYTES", 200 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("CV_ANALYSIS_CACHE_TTL", 7 * 24 * 3600)),
+    enabled=env_flag("CV_ANALYSIS_CACHE")
+)
+
+# Top-level fields the analysis prompts ask for, used to abort streams early
+ANALYSIS_SCHEMA = {
+    "name": str,
+    "education": dict,
+    "experience": dict,
+    "analysis": dict,
+    "summary": str,
+    "interview_questions": list,
+}
+
+AUDIO_ANALYSIS_SCHEMA = {
+    "analysis": dict,
+    "red_flags": list,
+    "summary": str,
+}
+
+FieldCallback = Callable[[str, Any], None]
+
+# Extracted CV text keyed by SHA-256 of the file bytes, so a re-upload
+# (e.g. for another job category) skips PDF/DOCX parsing.
+EXTRACTION_CACHE = DiskCache(
+    "extraction",
+    max_bytes=int(os.environ.get("CV_EXTRACTION_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("CV_EXTRACTION_CACHE_TTL", 30 * 24 * 3600)),
+    enabled=env_flag("CV_EXTRACTION_CACHE")
+)
+
+def analysis_key(prompt: str = ANALYSIS_PROMPT, client: Optional[OllamaClient] = None) -> str:
+    """Identifies the prompt and model an analysis was produced with"""
+    client = client or get_ollama_client()
+    return make_cache_key(prompt, client.model)
+
+def extract_text_cached(file_path: str, max_chars: Optional[int] = CV_TEXT_BUDGET) -> str:
+    """Extract CV text, reusing the result for identical file contents.
+
+    max_chars=None extracts the full text; a cached full text also serves
+    any budgeted request for the same file.
+    """
+    digest = file_sha256(file_path)
+    cache_key = make_cache_key(digest, max_chars)
+    cached = EXTRACTION_CACHE.get(cache_key)
+    if cached is None and max_chars is not None:
+        cached = EXTRACTION_CACHE.get(make_cache_key(digest, None))
+    if cached is not None:
+        logger.debug(f"Extraction cache hit: {cache_key[:12]}")
+        return cached
+
+    if EXTRACTION_ISOLATION:
+        cv_text = get_extraction_pool().extract(file_path, max_chars=max_chars)
+    else:
+        cv_text = extract_cv_text(file_path, max_chars=max_chars)
+    EXTRACTION_CACHE.set(cache_key, cv_text)
+    return cv_text
+
+def parse_model_json(json_str: str) -> Dict[str, Any]:
+    """Parse the model's JSON answer, fixing common formatting issues"""
+    json_str = json_str.strip()
+    json_str = json_str.replace("\\n", "").replace("\\t", "")
+
+    # Handle nested JSON encoding
+    try:
+        result = json.loads(json_str)
+    except JSONDecodeError:
+        # Remove extra backslashes
+        json_str = json_str.encode().decode('unicode_escape')
+        try:
+            result = json.loads(json_str)
+        except JSONDecodeError as e:
+            logger.error(f"JSON Decode Failed. Cleaned String: {json_str}")
+            raise ValueError("Invalid JSON format from model") from e
+    if isinstance(result, str):
+        # The object came back as a JSON string
+        return parse_model_json(result)
+    return result
+
+def _stream_granite(client: OllamaClient, full_prompt: str, schema: Dict[str, Any],
+                    on_field: Optional[FieldCallback]) -> Dict[str, Any]:
+    """Stream the generation, reporting each top-level field as soon as it is complete"""
+    parser = IncrementalJSONParser(schema)
+    stream = client.generate_stream(full_prompt, format="json")
+    try:
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                if on_field:
+                    on_field(key, value)
+    except SchemaMismatch as e:
+        logger.error(f"Aborting stream, output does not match schema: {str(e)}")
+        raise ValueError(f"Model output does not match expected schema: {str(e)}") from e
+    finally:
+        stream.close()
+
+    if parser.complete:
+        return parser.fields
+    # Truncated or oddly encoded output: fall back to the lenient parser
+    return parse_model_json(parser.text)
+
+def _run_granite(prompt: str, text: str, job_category: str, use_cache: bool,
+                 client: Optional[OllamaClient], schema: Optional[Dict[str, Any]] = None,
+                 stream: bool = False, on_field: Optional[FieldCallback] = None,
+                 validate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 budget: int = CV_TEXT_BUDGET) -> Dict[str, Any]:
+    """Shared request/parse path for the Granite analysis calls.
+
+    Only the first budget characters of text are sent. Only answers that
+    pass validate are cached, so a malformed one is not served again on
+    every retry.
+    """
+    client = client or get_ollama_client()
+    if len(text) > budget:
+        logger.warning(f"Truncating {len(text)} characters of input to {budget}")
+    full_prompt = prompt.format(job_category=job_category)
+    full_prompt += f"\n\nCV Text:\n{text[:budget]}"
+
+    cache_key = make_cache_key(text[:budget], budget, job_category, prompt, client.model)
+    if use_cache:
+        cached = ANALYSIS_CACHE.get(cache_key)
+        if cached is not None and (validate is None or validate(cached)):
+            logger.debug(f"Analysis cache hit: {cache_key[:12]}")
+            if on_field:
+                for key, value in cached.items():
+                    on_field(key, value)
+            return cached
+
+    logger.debug(f"Prompt: {full_prompt[:100]}")
+    if stream:
+        result = _stream_granite(client, full_prompt, schema, on_field)
+    else:
+        result = parse_model_json(client.generate(full_prompt, format="json"))
+    logger.debug(f"Parsed result: {result}")
+    if validate is None or validate(result):
+        ANALYSIS_CACHE.set(cache_key, result)
+    else:
+        logger.warning(f"Not caching malformed analysis: {cache_key[:12]}")
+    return result
+
+def analyze_with_granite(cv_text: str, prompt_template: str, job_category: str,
+                         use_cache: bool = True,
+                         client: Optional[OllamaClient] = None,
+                         stream: bool = False,
+                         on_field: Optional[FieldCallback] = None) -> Dict[str, Any]:
+    """Handle Ollama's nested JSON response format.
+
+    With stream=True the answer is parsed incrementally and on_field(key, value)
+    is called for each top-level field as soon as it is complete.
+    """
     print("Analyzing CV with Granite model...")
     print("cv_text_analyze_with_granite", cv_text[:100])
     print("job_category_analyze_with_granite", job_category)
     print("prompt_template_analyze_with_granite", prompt_template[:100])
-    # Ensure the prompt template is formatted correctly
-    try:
-        full_prompt = ANALYSIS_PROMPT.format(job_category=job_category)
-        full_prompt += f"\n\nCV Text:\n{cv_text[:3000]}"
-        print("full_prompt_analyze_with_granite", full_prompt[:100])
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                "model": "granite3.3",  # Match exact model name
-                "prompt": full_prompt,
-                "format": "json",
-                "stream": False
-            },
-            timeout=120
-        )
-        response.raise_for_status()
-        print("Raw API Response:", response.text)
-        
-        # Extract and clean JSON string
-        raw_data = response.json()
-        json_str = raw_data.get("response", "{}")
-        
-        # Fix common formatting issues
-        json_str = json_str.strip()
-        json_str = json_str.replace("\\n", "").replace("\\t", "")
-        
-        # Handle nested JSON encoding
-        try:
-            result = json.loads(json_str)
-        except JSONDecodeError:
-            # Remove extra backslashes
-            json_str = json_str.encode().decode('unicode_escape')
-            result = json.loads(json_str)
-        
-        print("Parsed Result:", result)
-        return result
-        
-    except JSONDecodeError as e:
-        logger.error(f"JSON Decode Failed. Cleaned String: {json_str}")
-        raise ValueError("Invalid JSON format from model") from e
+    return _run_granite(ANALYSIS_PROMPT, cv_text, job_category, use_cache, client,
+                        schema=ANALYSIS_SCHEMA, stream=stream, on_field=on_field,
+                        validate=validate_analysis_format)
+
+def analyze_audio_with_granite(cv_text: str, prompt_template: str, job_category: str,
+                               use_cache: bool = True,
+                               client: Optional[OllamaClient] = None,
+                               stream: bool = False,
+                               on_field: Optional[FieldCallback] = None) -> Dict[str, Any]:
+    """Handle Ollama's nested JSON response format.
 
-def analyze_audio_with_granite(cv_text: str, prompt_template: str, job_category: str) -> Dict[str, Any]:
-    """Handle Ollama's nested JSON response format"""
+    With stream=True the answer is parsed incrementally and on_field(key, value)
+    is called for each top-level field as soon as it is complete.
+    """
     print("Analyzing Audio with Granite model...")
     print("cv_text_analyze_audio_with_granite", cv_text[:100])
     print("job_category_analyze_audio_with_granite", job_category)
     print("prompt_template_analyze_audio_with_granite", prompt_template[:100])
-    # Ensure the prompt template is formatted correctly
-    try:
-        full_prompt = AUDIO_ANALYSIS_PROMPT.format(job_category=job_category)
-        full_prompt += f"\n\nCV Text:\n{cv_text[:3000]}"
-        print("full_prompt_analyze_audio_with_granite", full_prompt[:100])
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                "model": "granite3.3",  # Match exact model name
-                "prompt": full_prompt,
-                "format": "json",
-                "stream": False
-            },
-            timeout=120
-        )
-        response.raise_for_status()
-        print("Raw API Response:", response.text)
-        
-        # Extract and clean JSON string
-        raw_data = response.json()
-        json_str = raw_data.get("response", "{}")
-        
-        # Fix common formatting issues
-        json_str = json_str.strip()
-        json_str = json_str.replace("\\n", "").replace("\\t", "")
-        
-        # Handle nested JSON encoding
-        try:
-            result = json.loads(json_str)
-        except JSONDecodeError:
-            # Remove extra backslashes
-            json_str = json_str.encode().decode('unicode_escape')
-            result = json.loads(json_str)
-        
-        print("Parsed Result:", result)
-        return result
-        
-    except JSONDecodeError as e:
-        logger.error(f"JSON Decode Failed. Cleaned String: {json_str}")
-        raise ValueError("Invalid JSON format from model") from e
+    return _run_granite(AUDIO_ANALYSIS_PROMPT, cv_text, job_category, use_cache, client,
+                        schema=AUDIO_ANALYSIS_SCHEMA, stream=stream, on_field=on_field,
+                        validate=validate_audio_analysis_format, budget=TRANSCRIPT_TEXT_BUDGET)
 
 
 def validate_analysis_format(result: Dict) -> bool:
@@ -117,21 +217,34 @@ def validate_analysis_format(result: Dict) -> bool:
         'innovative', 'cultural_fit'
     }
     
-    return all(
+    return isinstance(result, dict) and all(
         key in result for key in required_keys
-    ) and all(
+    ) and isinstance(result['analysis'], dict) and all(
         key in result['analysis'] for key in analysis_subkeys
+    ) and any(
+        isinstance(result['analysis'][key], (int, float)) for key in analysis_subkeys
+    )
+
+def validate_audio_analysis_format(result: Dict) -> bool:
+    """Validate the structure of interview analysis results"""
+    return isinstance(result, dict) and all(
+        isinstance(result.get(key), kind) for key, kind in AUDIO_ANALYSIS_SCHEMA.items()
     )
 
-def process_cv(file_path: str, job_category: str) -> Dict[str, Any]:
+def process_cv(file_path: str, job_category: str, use_cache: bool = True,
+               on_field: Optional[FieldCallback] = None,
+               on_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """Main CV processing pipeline"""
     print("Processing CV:")
     try:
         # 1. Extract text
-        cv_text = extract_cv_text(file_path)
+        cv_text = extract_text_cached(file_path, max_chars=CV_TEXT_BUDGET)
         print("cv_text_process_cv", cv_text[:100])
+        if on_stage:
+            on_stage("extracted")
         # 2. Analyze with AI model
-        analysis = analyze_with_granite(cv_text, ANALYSIS_PROMPT, job_category)
+        analysis = analyze_with_granite(cv_text, ANALYSIS_PROMPT, job_category, use_cache=use_cache,
+                                        stream=on_field is not None, on_field=on_field)
         print("analysis done")
         # 3. Calculate average score
         scores = [v for v in analysis['analysis'].values() if isinstance(v, (int, float))]
@@ -0,0 +1,198 @@
+# dedup.py
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.cache import DEFAULT_CACHE_ROOT
+
+DEFAULT_DEDUP_DB = os.environ.get("CV_DEDUP_DB", os.path.join(DEFAULT_CACHE_ROOT, "near_duplicates.sqlite3"))
+DEFAULT_DEDUP_THRESHOLD = float(os.environ.get("CV_DEDUP_THRESHOLD", "0.8"))
+# Documents older than this, or beyond this many (oldest first), are pruned when the index is opened
+DEFAULT_DEDUP_MAX_AGE = float(os.environ.get("CV_DEDUP_MAX_AGE", 180 * 24 * 3600))
+DEFAULT_DEDUP_MAX_DOCS = int(os.environ.get("CV_DEDUP_MAX_DOCS", "100000"))
+
+_PRIME = (1 << 31) - 1  # keeps a * h + b inside uint64
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS docs (
+        doc_id    TEXT PRIMARY KEY,
+        file_name TEXT,
+        signature BLOB NOT NULL,
+        added_at  REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS buckets (
+        bucket TEXT NOT NULL,
+        doc_id TEXT NOT NULL,
+        PRIMARY KEY (bucket, doc_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS docs_added_at ON docs (added_at)",
+    "CREATE INDEX IF NOT EXISTS buckets_doc_id ON buckets (doc_id)",
+    """
+    CREATE TABLE IF NOT EXISTS settings (
+        key   TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """,
+)
+
+
+class MinHasher:
+    """MinHash signatures of word shingles; equal signature slots estimate Jaccard similarity"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = set(self.shingles(text))
+        if not shingles:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint32)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") % _PRIME
+             for s in shingles],
+            dtype=np.uint64
+        )
+        # One row per permutation h -> (a*h + b) mod p, minimum over shingles
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return float(np.mean(sig_a == sig_b))
+
+
+class DuplicateIndex:
+    """Persistent MinHash/LSH index of extracted CV texts.
+
+    Signatures are cut into bands; documents sharing any band bucket become
+    candidates and are verified against the threshold. Buckets are looked up
+    through an SQLite primary key, so a query touches a handful of rows
+    however large the archive grows. With 16 bands of 8 rows, pairs at
+    Jaccard 0.8 collide with ~95% probability and pairs at 0.3 almost never.
+    The archive is pruned by age and size each time the index is opened.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DEDUP_DB, threshold: float = DEFAULT_DEDUP_THRESHOLD,
+                 num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                 max_age: Optional[float] = DEFAULT_DEDUP_MAX_AGE,
+                 max_docs: Optional[int] = DEFAULT_DEDUP_MAX_DOCS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._check_settings(f"{num_perm}:{bands}:{shingle_size}")
+        self._conn.commit()
+        self.prune(max_age, max_docs)
+
+    def _check_settings(self, params: str) -> None:
+        """Signatures are only comparable with the same hashing parameters"""
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'minhash'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO settings (key, value) VALUES ('minhash', ?)", (params,))
+        elif row[0] != params:
+            raise ValueError(f"{self.db_path} was built with MinHash settings {row[0]}, not {params}")
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[str]:
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    def add(self, doc_id: str, signature: np.ndarray, file_name: Optional[str] = None) -> None:
+        """Index a document (doc_id is its content hash); re-adding is a no-op"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO docs (doc_id, file_name, signature, added_at) VALUES (?, ?, ?, ?)",
+                (doc_id, file_name, signature.astype(np.uint32).tobytes(), time.time())
+            )
+            if cursor.rowcount:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                    [(key, doc_id) for key in self._bucket_keys(signature)]
+                )
+            self._conn.commit()
+
+    def query(self, signature: np.ndarray, threshold: Optional[float] = None,
+              limit: Optional[int] = 5) -> List[Dict[str, Any]]:
+        """Indexed documents at least threshold-similar, most similar first (all with limit=None)"""
+        threshold = self.threshold if threshold is None else threshold
+        keys = self._bucket_keys(signature)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT docs.doc_id, docs.file_name, docs.signature FROM docs "
+                "WHERE docs.doc_id IN (SELECT DISTINCT doc_id FROM buckets "
+                f"WHERE bucket IN ({', '.join('?' for _ in keys)}))",
+                keys
+            ).fetchall()
+        matches = []
+        for doc_id, file_name, blob in rows:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold:
+                matches.append({"doc_id": doc_id, "file_name": file_name, "similarity": round(score, 3)})
+        matches.sort(key=lambda m: -m["similarity"])
+        return matches if limit is None else matches[:limit]
+
+    def prune(self, max_age: Optional[float] = None, max_docs: Optional[int] = None) -> int:
+        """Drop documents added more than max_age seconds ago, then the oldest beyond max_docs.
+
+        Returns the number of documents removed.
+        """
+        with self._lock:
+            stale = []
+            if max_age is not None:
+                stale += [row[0] for row in self._conn.execute(
+                    "SELECT doc_id FROM docs WHERE added_at < ?", (time.time() - max_age,))]
+            if max_docs is not None:
+                stale += [row[0] for row in self._conn.execute(
+                    "SELECT doc_id FROM docs ORDER BY added_at DESC LIMIT -1 OFFSET ?", (max_docs,))]
+            stale = list(set(stale))
+            for start in range(0, len(stale), 500):
+                chunk = stale[start:start + 500]
+                marks = ", ".join("?" for _ in chunk)
+                self._conn.execute(f"DELETE FROM buckets WHERE doc_id IN ({marks})", chunk)
+                self._conn.execute(f"DELETE FROM docs WHERE doc_id IN ({marks})", chunk)
+            self._conn.commit()
+        return len(stale)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,148 @@
+# job_store.py
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.cache import DEFAULT_CACHE_ROOT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_DB = os.environ.get("CV_JOB_DB", os.path.join(DEFAULT_CACHE_ROOT, "jobs.sqlite3"))
+
+# Lifecycle of one CV in a batch
+QUEUED = "queued"
+EXTRACTED = "extracted"
+ANALYSED = "analysed"
+REPORTED = "reported"
+FAILED = "failed"
+
+JOB_STATES = (QUEUED, EXTRACTED, ANALYSED, REPORTED, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    content_hash TEXT NOT NULL,
+    job_category TEXT NOT NULL,
+    file_name    TEXT,
+    state        TEXT NOT NULL,
+    result_json  TEXT,
+    report_path  TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    updated_at   REAL NOT NULL,
+    analysis_key TEXT,
+    PRIMARY KEY (content_hash, job_category)
+)
+"""
+
+_COLUMNS = ("content_hash, job_category, file_name, state, result_json, "
+            "report_path, error, attempts, updated_at, analysis_key")
+
+
+class JobStore:
+    """SQLite record of per-file batch progress, keyed by content hash and job category.
+
+    A restarted batch looks each file up here: reported items are reused,
+    analysed items only need their report, and queued/extracted/failed items
+    are processed again. A job whose stored analysis_key (prompt and model)
+    differs from the caller's is treated as not found.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_JOB_DB):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "analysis_key" not in columns:
+            # Stores created before analysis keys were recorded
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN analysis_key TEXT")
+        self._conn.commit()
+
+    def get(self, content_hash: str, job_category: str,
+            analysis_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the stored job as a dict (result decoded), or None.
+
+        With analysis_key, a job analysed under another prompt or model is None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE content_hash = ? AND job_category = ?",
+                (content_hash, job_category)
+            ).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_dict(row)
+        if analysis_key is not None and job["analysis_key"] != analysis_key:
+            return None
+        return job
+
+    def mark(self, content_hash: str, job_category: str, state: str,
+             file_name: Optional[str] = None, result: Optional[Dict[str, Any]] = None,
+             report_path: Optional[str] = None, error: Optional[str] = None,
+             analysis_key: Optional[str] = None) -> None:
+        """Move a job to a new state; fields left as None keep their stored value"""
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state: {state}")
+        result_json = json.dumps(result) if result is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO jobs (content_hash, job_category, file_name, state, result_json,
+                                  report_path, error, attempts, updated_at, analysis_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (content_hash, job_category) DO UPDATE SET
+                    file_name   = COALESCE(excluded.file_name, file_name),
+                    state       = excluded.state,
+                    result_json = COALESCE(excluded.result_json, result_json),
+                    report_path = COALESCE(excluded.report_path, report_path),
+                    error       = excluded.error,
+                    attempts    = attempts + excluded.attempts,
+                    updated_at  = excluded.updated_at,
+                    analysis_key = COALESCE(excluded.analysis_key, analysis_key)
+                """,
+                (content_hash, job_category, file_name, state, result_json,
+                 report_path, error, 1 if state == QUEUED else 0, time.time(), analysis_key)
+            )
+            self._conn.commit()
+
+    def list_jobs(self, job_category: Optional[str] = None,
+                  states: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """All jobs, optionally filtered by category and state"""
+        query = f"SELECT {_COLUMNS} FROM jobs WHERE 1 = 1"
+        params: List[Any] = []
+        if job_category is not None:
+            query += " AND job_category = ?"
+            params.append(job_category)
+        if states:
+            query += f" AND state IN ({', '.join('?' for _ in states)})"
+            params.extend(states)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def counts(self, job_category: Optional[str] = None) -> Dict[str, int]:
+        """Number of jobs per state"""
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.list_jobs(job_category):
+            counts[job["state"]] += 1
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        keys = ("content_hash", "job_category", "file_name", "state", "result",
+                "report_path", "error", "attempts", "updated_at", "analysis_key")
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
@@ -0,0 +1,146 @@
+# model_registry.py
+import os
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from asr_backends import ASRBackend, create_backend, DEFAULT_ASR_BACKEND, SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Approximate resident size of each Whisper model in fp32 (MB)
+MODEL_MEMORY_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 290, "base.en": 290,
+    "small": 970, "small.en": 970,
+    "medium": 3100, "medium.en": 3100,
+    "large": 6200, "large-v1": 6200, "large-v2": 6200, "large-v3": 6200,
+    "turbo": 3200, "large-v3-turbo": 3200,
+}
+# int8 CTranslate2 weights are roughly a quarter of fp32
+COMPUTE_TYPE_FACTOR = {"int8": 0.25, "int8_float16": 0.3, "float16": 0.5, "float32": 1.0}
+
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("ASR_MEMORY_BUDGET_MB", "4096"))
+
+
+def estimate_memory_mb(backend: ASRBackend) -> int:
+    size = MODEL_MEMORY_MB.get(backend.model_size, 1000)
+    factor = COMPUTE_TYPE_FACTOR.get(getattr(backend, "compute_type", "float32"), 1.0)
+    return int(size * factor)
+
+
+class ModelRegistry:
+    """Loads each ASR model once per process and keeps it warm.
+
+    Models are shared by every AudioProcessor (and Streamlit session). When the
+    estimated footprint of loaded models exceeds the memory budget, the least
+    recently used ones are dropped.
+    """
+
+    def __init__(self, memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB, warm_up: bool = True):
+        self.memory_budget_mb = memory_budget_mb
+        self.warm_up_enabled = warm_up
+        self._models: "OrderedDict[Tuple, ASRBackend]" = OrderedDict()
+        self._metrics: Dict[Tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(backend: Optional[str], model_size: str, options: Dict[str, Any]) -> Tuple:
+        return ((backend or DEFAULT_ASR_BACKEND).lower(), model_size, tuple(sorted(options.items())))
+
+    def get_backend(self, backend: Optional[str] = None, model_size: str = "base",
+                    **options) -> ASRBackend:
+        """Return a loaded, warmed-up backend, loading it on first use"""
+        key = self.make_key(backend, model_size, options)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._metrics[key]["hits"] += 1
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # One loader per model; concurrent callers wait instead of loading twice
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._metrics[key]["hits"] += 1
+                    return self._models[key]
+            instance = self._load(key, backend, model_size, options)
+            with self._lock:
+                self._models[key] = instance
+                self._evict(keep=key)
+            return instance
+
+    def _load(self, key: Tuple, backend: Optional[str], model_size: str,
+              options: Dict[str, Any]) -> ASRBackend:
+        instance = create_backend(backend, model_size, **options)
+        start = time.perf_counter()
+        instance.model  # noqa: B018 - triggers the lazy load
+        load_seconds = time.perf_counter() - start
+
+        warmup_seconds = None
+        if self.warm_up_enabled:
+            start = time.perf_counter()
+            try:
+                # Dummy decode so the first real request doesn't pay kernel/graph setup
+                instance.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+            except Exception as e:
+                logger.warning(f"ASR warm-up failed for {key}: {str(e)}")
+            warmup_seconds = time.perf_counter() - start
+
+        logger.info(f"Loaded ASR model {key[0]}/{model_size} in {load_seconds:.1f}s "
+                    f"(warm-up {warmup_seconds or 0:.1f}s)")
+        with self._lock:
+            self._metrics[key] = {
+                "backend": instance.name,
+                "model_size": model_size,
+                "device": instance.device,
+                "load_seconds": round(load_seconds, 2),
+                "warmup_seconds": round(warmup_seconds, 2) if warmup_seconds is not None else None,
+                "estimated_mb": estimate_memory_mb(instance),
+                "loaded_at": time.time(),
+                "hits": 0,
+            }
+        return instance
+
+    def _evict(self, keep: Tuple) -> None:
+        """Drop least recently used models until within budget (caller holds the lock)"""
+        def total_mb():
+            return sum(self._metrics[k]["estimated_mb"] for k in self._models)
+
+        while total_mb() > self.memory_budget_mb and len(self._models) > 1:
+            oldest = next(k for k in self._models if k != keep)
+            logger.info(f"Evicting ASR model {oldest[0]}/{oldest[1]} (memory budget "
+                        f"{self.memory_budget_mb} MB)")
+            del self._models[oldest]
+            self._metrics[oldest]["evicted_at"] = time.time()
+            gc.collect()
+
+    def loaded(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{k[0]}/{k[1]}": self._metrics[k]["estimated_mb"] for k in self._models}
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Load/warm-up timings and usage per model ever loaded in this process"""
+        with self._lock:
+            return {f"{k[0]}/{k[1]}": dict(v, loaded=k in self._models)
+                    for k, v in self._metrics.items()}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,102 @@
+# ollama_client.py
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+DEFAULT_OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "granite3.3")
+# How long Ollama keeps the model in memory after a request
+DEFAULT_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+
+class OllamaClient:
+    """Reusable Ollama client with a pooled keep-alive HTTP session"""
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_HOST, model: str = DEFAULT_OLLAMA_MODEL,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 keep_alive: str = DEFAULT_KEEP_ALIVE, pool_size: int = 16):
+        if not base_url.startswith(("http://", "https://")):
+            base_url = f"http://{base_url}"
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.keep_alive = keep_alive
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, prompt: str, format: Optional[str], stream: bool,
+                 options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if format:
+            payload["format"] = format
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(self, prompt: str, format: Optional[str] = "json",
+                 options: Optional[Dict[str, Any]] = None) -> str:
+        """Run a non-streaming /api/generate call and return the response text"""
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(prompt, format, False, options),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        logger.debug(f"Raw API response: {response.text[:500]}")
+        return response.json().get("response", "{}")
+
+    def generate_stream(self, prompt: str, format: Optional[str] = "json",
+                        options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream /api/generate and yield response text chunks as they arrive.
+
+        Closing the generator early (e.g. on a schema mismatch) closes the
+        HTTP response, which makes Ollama stop generating.
+        """
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(prompt, format, True, options),
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    def close(self):
+        self.session.close()
+
+
+_default_client: Optional[OllamaClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Process-wide shared client so every caller reuses the same connection pool"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OllamaClient()
+        return _default_client
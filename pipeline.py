@@ -0,0 +1,435 @@
+# pipeline.py
+import os
+import time
+import queue
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from utils import save_uploaded_file, file_sha256
+from utils.extraction_pool import ExtractionError
+from cv_processor import process_cv, extract_text_cached, analysis_key
+from report_generator import build_pdf_report, get_report_pool, report_workers
+from job_store import JobStore, QUEUED, ANALYSED, REPORTED, FAILED
+from prescreen import score_texts, select, rank
+from dedup import DuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# Match this to OLLAMA_NUM_PARALLEL on the Ollama server
+DEFAULT_MAX_WORKERS = int(os.environ.get("CV_MAX_WORKERS", "4"))
+
+# "file" writes each report under temp_dir in-process; "pool" has the report
+# process pool write it there
+REPORT_FILE = "file"
+REPORT_POOL = "pool"
+DEFAULT_REPORT_MODE = os.environ.get("CV_REPORT_MODE", REPORT_FILE)
+
+T = TypeVar("T")
+
+
+def _source_name(source) -> str:
+    return os.path.basename(source) if isinstance(source, str) else source.name
+
+
+def render_report(result: Dict[str, Any], temp_dir: str, report_mode: str = DEFAULT_REPORT_MODE,
+                  audio_analysis: Optional[Dict[str, Any]] = None) -> str:
+    """Build one report under temp_dir in the given mode; returns its path"""
+    if report_mode == REPORT_POOL:
+        return get_report_pool().render(result, audio_analysis, output_dir=temp_dir)
+    if report_mode != REPORT_FILE:
+        raise ValueError(f"Unknown report mode: {report_mode}")
+    return build_pdf_report(result, temp_dir, audio_analysis)
+
+
+def process_single_cv(uploaded_file, temp_dir: str, job_category: str,
+                      build_report: bool = True, use_cache: bool = True,
+                      on_field: Optional[Callable[[str, Any], None]] = None,
+                      job_store: Optional[JobStore] = None,
+                      report_mode: str = DEFAULT_REPORT_MODE,
+                      name: Optional[str] = None) -> Dict[str, Any]:
+    """Per-file pipeline: save, extract + analyse, build PDF report.
+
+    uploaded_file is a Streamlit UploadedFile or a path to a file already on disk
+    (name then overrides the display name, e.g. for a file saved by the pre-screen).
+    With a job_store, work already recorded for the same content hash, job
+    category, prompt and model is reused and every stage transition is
+    persisted. use_cache=False skips that reuse as well as the analysis cache.
+    """
+    file_path = None
+    content_hash = None
+    name = name or _source_name(uploaded_file)
+    analysis_seconds = None
+    try:
+        if isinstance(uploaded_file, str):
+            file_path = uploaded_file
+        else:
+            file_path = save_uploaded_file(uploaded_file, temp_dir)
+
+        job = None
+        if job_store is not None:
+            content_hash = file_sha256(file_path)
+            current_key = analysis_key()
+            if use_cache:
+                job = job_store.get(content_hash, job_category, current_key)
+
+        if job and job["state"] == REPORTED and job["report_path"] and os.path.exists(job["report_path"]):
+            logger.info(f"Resuming completed job: {name}")
+            return _outcome(name, file_path, job["result"], job["report_path"], resumed=True)
+        if job and job["state"] == ANALYSED and not build_report:
+            return _outcome(name, file_path, job["result"], None, resumed=True)
+
+        if job and job["state"] in (ANALYSED, REPORTED) and job["result"]:
+            # Analysis survived the crash, only the report is missing
+            result = job["result"]
+            resumed = True
+        else:
+            if job_store is not None:
+                job_store.mark(content_hash, job_category, QUEUED, file_name=name,
+                               analysis_key=current_key)
+                on_stage = lambda stage: job_store.mark(content_hash, job_category, stage)
+            else:
+                on_stage = None
+            analysis_start = time.perf_counter()
+            result = process_cv(file_path, job_category, use_cache=use_cache,
+                                on_field=on_field, on_stage=on_stage)
+            analysis_seconds = round(time.perf_counter() - analysis_start, 2)
+            resumed = False
+            if job_store is not None:
+                job_store.mark(content_hash, job_category, ANALYSED, result=result)
+
+        pdf_path = render_report(result, temp_dir, report_mode) if build_report else None
+        if job_store is not None and pdf_path:
+            job_store.mark(content_hash, job_category, REPORTED, report_path=pdf_path)
+        outcome = _outcome(name, file_path, result, pdf_path, resumed=resumed)
+        outcome["analysis_seconds"] = analysis_seconds
+        return outcome
+
+    except Exception as e:
+        base_name = os.path.basename(file_path) if file_path else name
+        logger.error(f"Pipeline failed for {base_name}: {str(e)}")
+        if job_store is not None and content_hash:
+            job_store.mark(content_hash, job_category, FAILED, error=str(e))
+        outcome = _outcome(name, file_path, None, None)
+        outcome["error"] = f"{base_name[:30]}: {str(e)}"
+        outcome["traceback"] = traceback.format_exc()
+        if isinstance(e, ExtractionError):
+            outcome["error_detail"] = e.to_dict()
+        return outcome
+
+
+def _outcome(name: str, file_path: Optional[str], result: Optional[Dict[str, Any]],
+             pdf_path: Optional[str], resumed: bool = False) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "file_path": file_path,
+        "result": result,
+        "pdf_path": pdf_path,
+        "error": None,
+        "resumed": resumed,
+        "skipped": False,
+    }
+
+
+def load_texts(uploaded_files, temp_dir: str,
+               max_workers: int = DEFAULT_MAX_WORKERS) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Save and extract every file in parallel: [(file_path, text)], None where that failed.
+
+    The full text is extracted, so the pre-screen and near-duplicate checks
+    see the whole CV rather than the LLM's budget. It goes through the
+    extraction cache, so files analysed later are not extracted again by
+    process_cv.
+    """
+    def load(source):
+        file_path = None
+        try:
+            file_path = source if isinstance(source, str) else save_uploaded_file(source, temp_dir)
+            return file_path, extract_text_cached(file_path, max_chars=None)
+        except Exception as e:
+            logger.warning(f"Could not read {_source_name(source)} ahead of analysis: {str(e)}")
+            return file_path, None
+
+    workers = max(1, min(max_workers, len(uploaded_files) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as pool:
+        return list(pool.map(load, uploaded_files))
+
+
+def prescreen_batch(uploaded_files, temp_dir: str, job_category: str,
+                    top_k: Optional[int] = None, min_score: Optional[float] = None,
+                    max_workers: int = DEFAULT_MAX_WORKERS,
+                    loaded: Optional[List[Tuple[Optional[str], Optional[str]]]] = None
+                    ) -> List[Dict[str, Any]]:
+    """Keyword pre-screen: score every file's text and pick who goes to the LLM.
+
+    Files are loaded with load_texts unless loaded is given. Files that cannot
+    be saved or extracted are always selected; the normal pipeline then fails
+    them with a proper error before any LLM call. Returns one dict per file in
+    upload order with name, file_path, score, rank, matched and selected.
+    """
+    if loaded is None:
+        loaded = load_texts(uploaded_files, temp_dir, max_workers)
+
+    start = time.perf_counter()
+    scores = score_texts([text or "" for _, text in loaded], job_category)
+    readable = [text is not None for _, text in loaded]
+    values = [s["score"] for s in scores]
+    mask = select([v if ok else -1.0 for v, ok in zip(values, readable)], top_k, min_score)
+    ranks = rank(values)
+    logger.info(f"Pre-screened {len(uploaded_files)} CVs in {time.perf_counter() - start:.3f}s, "
+                f"{int(mask.sum())} selected")
+
+    return [
+        {
+            "name": _source_name(source),
+            "file_path": file_path,
+            "score": score["score"],
+            "rank": int(ranks[idx]),
+            "matched": score["matched"],
+            "selected": bool(mask[idx]) or not readable[idx],
+        }
+        for idx, (source, (file_path, _), score) in enumerate(zip(uploaded_files, loaded, scores))
+    ]
+
+
+def link_duplicates(uploaded_files, loaded: List[Tuple[Optional[str], Optional[str]]],
+                    index: DuplicateIndex, job_category: str,
+                    job_store: Optional[JobStore] = None,
+                    archive_candidates: int = 5) -> List[Optional[Dict[str, Any]]]:
+    """Near-duplicate pass: look each readable CV up in the MinHash index, then add it.
+
+    A CV matching an earlier CV of this batch links to that CV (index set).
+    One matching an archived CV links to it when the job store holds its
+    analysis for this job category, prompt and model (job set). Anything else is a
+    representative and is analysed. A CV whose own content hash is indexed
+    (seen by an earlier run) is a representative when the job store holds
+    its own analysis, which process_single_cv then resumes; otherwise (e.g.
+    it was linked last time, or this is another job category) the search
+    goes on. Every candidate is checked against this batch, but only the
+    first archive_candidates archived ones are looked up in the job store.
+    Returns, per file, None or the link {"index", "job", "name", "similarity"}.
+    """
+    links: List[Optional[Dict[str, Any]]] = [None] * len(uploaded_files)
+    batch_docs: Dict[str, int] = {}  # content hash -> representative in this batch
+    current_key = analysis_key() if job_store is not None else None
+    for idx, (file_path, text) in enumerate(loaded):
+        if not file_path or not text:
+            continue
+        content_hash = file_sha256(file_path)
+        signature = index.signature(text)
+        archived = 0
+        matches = index.query(signature, limit=None)
+        # The file's own entry scores 1.0; put it ahead of other exact matches
+        matches.sort(key=lambda m: m["doc_id"] != content_hash)
+        for match in matches:
+            representative = batch_docs.get(match["doc_id"])
+            if representative is not None:
+                links[idx] = {"index": representative, "job": None,
+                              "name": _source_name(uploaded_files[representative]),
+                              "similarity": match["similarity"]}
+                break
+            if match["doc_id"] == content_hash:
+                own = job_store.get(content_hash, job_category, current_key) if job_store is not None else None
+                if own and own["result"]:
+                    break  # analysed by an earlier run; process_single_cv resumes it
+                continue
+            if job_store is None or archived >= archive_candidates:
+                continue
+            archived += 1
+            job = job_store.get(match["doc_id"], job_category, current_key)
+            if job and job["result"]:
+                links[idx] = {"index": None, "job": job,
+                              "name": match["file_name"] or job["file_name"],
+                              "similarity": match["similarity"]}
+                break
+
+        if links[idx] is None:
+            batch_docs.setdefault(content_hash, idx)
+        elif links[idx]["index"] is not None:
+            batch_docs.setdefault(content_hash, links[idx]["index"])
+        index.add(content_hash, signature, _source_name(uploaded_files[idx]))
+
+    linked = sum(1 for link in links if link)
+    if linked:
+        logger.info(f"Linked {linked} of {len(uploaded_files)} CVs to near-duplicates")
+    return links
+
+
+def _linked_outcome(name: str, file_path: Optional[str], source: Dict[str, Any],
+                    link: Dict[str, Any]) -> Dict[str, Any]:
+    """Outcome of a near-duplicate: the representative's result, report and errors"""
+    outcome = dict(source, name=name, file_path=file_path, resumed=False, analysis_seconds=None)
+    outcome.pop("prescreen", None)
+    # archived: the representative is from an earlier run, not part of this batch
+    outcome["duplicate_of"] = {"name": link["name"], "similarity": link["similarity"],
+                               "archived": link["job"] is not None}
+    return outcome
+
+
+def prescreen_summary(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Counts of a pre-screened batch and the LLM time the skipped CVs would have cost.
+
+    The per-CV cost is the mean analysis time of CVs analysed in this batch
+    (cache hits and resumed jobs included as they ran), so it is an estimate.
+    """
+    screened = [o for o in outcomes if o.get("prescreen") and not o.get("duplicate_of")]
+    skipped = sum(1 for o in screened if o.get("skipped"))
+    timed = [o["analysis_seconds"] for o in outcomes if o.get("analysis_seconds")]
+    per_cv = sum(timed) / len(timed) if timed else None
+    return {
+        "screened": len(screened),
+        "analysed": len(screened) - skipped,
+        "skipped": skipped,
+        "llm_seconds_per_cv": round(per_cv, 2) if per_cv is not None else None,
+        "estimated_llm_seconds_saved": round(per_cv * skipped, 1) if per_cv is not None else None,
+    }
+
+
+def process_batch(uploaded_files, temp_dir: str, job_category: str,
+                  max_workers: int = DEFAULT_MAX_WORKERS,
+                  build_report: bool = True,
+                  use_cache: bool = True,
+                  on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                  on_field: Optional[Callable[[int, str, Any], None]] = None,
+                  job_store: Optional[JobStore] = None,
+                  report_mode: str = DEFAULT_REPORT_MODE,
+                  top_k: Optional[int] = None,
+                  min_score: Optional[float] = None,
+                  dedup_index: Optional[DuplicateIndex] = None
+                  ) -> List[Dict[str, Any]]:
+    """Run process_single_cv over a batch with bounded concurrency.
+
+    Results are returned in upload order. on_progress(index, outcome) is
+    invoked from the calling thread as each file completes, so it is safe
+    to update Streamlit elements from it. Passing on_field(index, key, value)
+    switches the LLM call to streaming mode; streamed fields are relayed to
+    the calling thread the same way. A job_store makes the batch resumable.
+    With report_mode="pool" reports are rendered in the report process pool,
+    sized by report_workers(max_workers), so report time scales with cores
+    rather than with the GIL.
+
+    Setting top_k and/or min_score runs prescreen_batch first: only the
+    selected CVs are analysed, the rest come back with skipped=True. Every
+    outcome then carries its pre-screen entry under "prescreen".
+
+    With a dedup_index, near-duplicate CVs (link_duplicates) are not analysed
+    or pre-screened themselves: once their representative finishes they get
+    its outcome, with "duplicate_of" naming it.
+    """
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(uploaded_files)
+    workers = max(1, min(max_workers, len(uploaded_files) or 1))
+    fields: "queue.Queue" = queue.Queue()
+    if build_report and report_mode == REPORT_POOL:
+        get_report_pool(report_workers(max_workers))
+
+    def field_relay(idx):
+        if on_field is None:
+            return None
+        return lambda key, value: fields.put((idx, key, value))
+
+    def drain_fields():
+        while True:
+            try:
+                idx, key, value = fields.get_nowait()
+            except queue.Empty:
+                return
+            on_field(idx, key, value)
+
+    def finish(idx, outcome):
+        outcomes[idx] = outcome
+        if on_progress:
+            on_progress(idx, outcome)
+        # Near-duplicates waiting on this representative
+        for dup_idx, link in enumerate(links):
+            if link and link["index"] == idx and outcomes[dup_idx] is None:
+                finish(dup_idx, _linked_outcome(_source_name(uploaded_files[dup_idx]),
+                                                loaded[dup_idx][0], outcome, link))
+
+    screens: List[Optional[Dict[str, Any]]] = [None] * len(uploaded_files)
+    links: List[Optional[Dict[str, Any]]] = [None] * len(uploaded_files)
+    sources = list(uploaded_files)
+    prescreen = top_k is not None or min_score is not None
+    if dedup_index is not None or prescreen:
+        loaded = load_texts(uploaded_files, temp_dir, max_workers)
+        sources = [file_path or source for source, (file_path, _) in zip(uploaded_files, loaded)]
+
+    if dedup_index is not None:
+        # use_cache=False asks for fresh analyses, so archived results are not linked either
+        links = link_duplicates(uploaded_files, loaded, dedup_index, job_category,
+                                job_store if use_cache else None)
+        for idx, link in enumerate(links):
+            if link and link["job"]:
+                job = link["job"]
+                report_path = job["report_path"] if job["report_path"] and os.path.exists(job["report_path"]) else None
+                archived = _outcome(link["name"], None, job["result"], report_path, resumed=True)
+                finish(idx, _linked_outcome(_source_name(uploaded_files[idx]), loaded[idx][0], archived, link))
+
+    if prescreen:
+        representatives = [idx for idx, link in enumerate(links) if link is None]
+        rep_screens = prescreen_batch([uploaded_files[idx] for idx in representatives], temp_dir,
+                                      job_category, top_k, min_score, max_workers,
+                                      loaded=[loaded[idx] for idx in representatives])
+        for idx, screen in zip(representatives, rep_screens):
+            screens[idx] = screen
+            if not screen["selected"]:
+                skipped = _outcome(screen["name"], screen["file_path"], None, None)
+                skipped["skipped"] = True
+                skipped["prescreen"] = screen
+                finish(idx, skipped)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cv") as pool:
+        futures = {
+            pool.submit(process_single_cv, source, temp_dir, job_category,
+                        build_report=build_report, use_cache=use_cache,
+                        on_field=field_relay(idx), job_store=job_store,
+                        report_mode=report_mode, name=_source_name(uploaded_files[idx])): idx
+            for idx, source in enumerate(sources)
+            if outcomes[idx] is None and links[idx] is None
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            if on_field:
+                drain_fields()
+            for future in done:
+                idx = futures[future]
+                outcome = future.result()
+                if screens[idx] is not None:
+                    outcome["prescreen"] = screens[idx]
+                finish(idx, outcome)
+
+    return outcomes
+
+
+def overlap_with_audio(cv_task: Callable[[], T], processor, audio_file, job_category: str,
+                       **transcribe_options) -> Tuple[T, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Run cv_task on the calling thread while the audio pipeline runs in the background.
+
+    Whisper transcription is CPU-bound and the CV analysis mostly waits on
+    Ollama, so overlapping them brings candidate latency down to roughly
+    max(ASR, LLM). cv_task stays on the calling thread so Streamlit callbacks
+    keep working. Returns (cv_task result, audio analysis or None, timings);
+    timings also holds this call's transcription stats under "asr".
+    """
+    timings: Dict[str, Any] = {}
+
+    def audio_task():
+        start = time.perf_counter()
+        try:
+            analysis, timings["asr"] = processor.process_audio_with_stats(
+                audio_file, job_category, **transcribe_options)
+            return analysis
+        finally:
+            timings["audio_seconds"] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio") as pool:
+        audio_future = pool.submit(audio_task)
+        cv_start = time.perf_counter()
+        cv_result = cv_task()
+        timings["cv_seconds"] = round(time.perf_counter() - cv_start, 2)
+        audio_analysis = audio_future.result()
+    timings["total_seconds"] = round(time.perf_counter() - start, 2)
+    logger.info(f"CV {timings['cv_seconds']}s + audio {timings['audio_seconds']}s "
+                f"finished in {timings['total_seconds']}s")
+    return cv_result, audio_analysis, timings
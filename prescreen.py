@@ -0,0 +1,119 @@
+# prescreen.py
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Weighted terms per job category; rarer, more specific terms weigh more
+CATEGORY_PROFILES: Dict[str, Dict[str, float]] = {
+    "Data Engineer": {
+        "spark": 3, "airflow": 3, "etl": 3, "data pipeline": 3, "kafka": 2, "sql": 2,
+        "python": 2, "data warehouse": 2, "data lake": 2, "snowflake": 2, "databricks": 2,
+        "dbt": 2, "hadoop": 2, "scala": 2, "bigquery": 2, "redshift": 2, "aws": 1,
+        "azure": 1, "gcp": 1, "docker": 1, "kubernetes": 1,
+    },
+    "Data Analyst": {
+        "sql": 3, "excel": 3, "tableau": 3, "power bi": 3, "dashboard": 2,
+        "data visualization": 2, "pandas": 2, "statistics": 2, "reporting": 2, "kpi": 2,
+        "looker": 2, "business intelligence": 2, "analytics": 2, "python": 1,
+        "hypothesis testing": 1, "ab testing": 1,
+    },
+    "AI Engineer": {
+        "machine learning": 3, "deep learning": 3, "pytorch": 3, "tensorflow": 3, "llm": 3,
+        "nlp": 2, "computer vision": 2, "transformers": 2, "hugging face": 2, "huggingface": 2,
+        "mlops": 2, "scikit learn": 2, "langchain": 2, "neural network": 2, "keras": 2,
+        "python": 2, "rag": 1, "model deployment": 1,
+    },
+    "UI/UX Developer": {
+        "figma": 3, "ux": 3, "user experience": 3, "ui": 2, "user interface": 2,
+        "wireframe": 2, "prototype": 2, "design system": 2, "usability testing": 2,
+        "user research": 2, "accessibility": 2, "react": 2, "javascript": 2, "typescript": 2,
+        "css": 2, "html": 2, "adobe xd": 2, "sketch": 1, "vue": 1,
+    },
+}
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def _stem(token: str) -> str:
+    """Crude plural folding, applied to CV text and profiles alike"""
+    token = token.rstrip(".")
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased unigrams plus adjacent bigrams ('power bi', 'machine learning')"""
+    words = [_stem(w) for w in _TOKEN.findall(text.lower().replace("_", " ").replace("-", " "))]
+    words = [w for w in words if w]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _profile_term(term: str) -> str:
+    return " ".join(_stem(w) for w in _TOKEN.findall(term.lower().replace("-", " ")))
+
+
+def term_matrix(texts: Sequence[str], terms: Sequence[str]) -> np.ndarray:
+    """Counts of each profile term per document, shape (len(texts), len(terms)).
+
+    Only profile terms are kept, so the matrix stays small and dense.
+    """
+    index = {term: j for j, term in enumerate(terms)}
+    counts = np.zeros((len(texts), len(terms)), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for token, n in Counter(tokenize(text or "")).items():
+            j = index.get(token)
+            if j is not None:
+                counts[i, j] = n
+    return counts
+
+
+def score_texts(texts: Sequence[str], job_category: str,
+                profiles: Optional[Dict[str, Dict[str, float]]] = None) -> List[Dict[str, Any]]:
+    """Keyword score in [0, 1] of each CV against the job category's profile.
+
+    Term frequency is saturated (1 - e^-count) so repeating a buzzword does
+    not dominate, then weighted by the profile: the score is the weighted
+    share of the profile a CV covers. Scores depend only on the CV itself,
+    so they can be cached and compared across batches.
+    """
+    profile = (profiles or CATEGORY_PROFILES).get(job_category)
+    if not profile:
+        raise ValueError(f"No pre-screen profile for job category: {job_category}")
+    terms = [_profile_term(term) for term in profile]
+    weights = np.array(list(profile.values()), dtype=np.float32)
+
+    tf = 1.0 - np.exp(-term_matrix(texts, terms))
+    scores = tf @ weights / weights.sum()
+
+    results = []
+    for i, score in enumerate(scores):
+        hits = np.flatnonzero(tf[i])
+        matched = [terms[j] for j in hits[np.argsort(-weights[hits], kind="stable")]]
+        results.append({"score": round(float(score), 4), "matched": matched[:10]})
+    return results
+
+
+def select(scores: Sequence[float], top_k: Optional[int] = None,
+           min_score: Optional[float] = None) -> np.ndarray:
+    """Mask of candidates to send to the LLM: at least min_score and within the top_k"""
+    scores = np.asarray(scores, dtype=np.float32)
+    mask = np.ones(len(scores), dtype=bool)
+    if min_score is not None:
+        mask &= scores >= min_score
+    if top_k is not None and top_k < mask.sum():
+        # Stable sort keeps upload order among equal scores
+        ranked = [i for i in np.argsort(-scores, kind="stable") if mask[i]]
+        mask[:] = False
+        mask[ranked[:max(top_k, 0)]] = True
+    return mask
+
+
+def rank(scores: Sequence[float]) -> np.ndarray:
+    """1-based rank of each score, highest first"""
+    order = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")
+    ranks = np.empty(len(order), dtype=int)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
@@ -1,15 +1,40 @@
+import os
+import json
+import atexit
+import hashlib
+import logging
+import functools
+import threading
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from reportlab.lib.colors import HexColor
 from io import BytesIO
-from PyPDF2 import PdfMerger
+from PyPDF2 import PdfWriter
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, ListItem, ListFlowable
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListItem, ListFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
-from utils.visualization import create_radar_chart
-from reportlab.platypus import Table
-from reportlab.lib.styles import ParagraphStyle
+from utils.visualization import radar_drawing
+from reportlab.platypus import Table, TableStyle
 from reportlab.lib.enums import TA_CENTER
 
+logger = logging.getLogger(__name__)
+
+
+def report_workers(max_workers):
+    """Report processes for a batch of max_workers concurrent CVs.
+
+    ReportLab is CPU-bound, so batch reports are rendered in worker processes.
+    Capped by the CV worker setting so a Streamlit server doesn't start one
+    process per core; CV_REPORT_WORKERS overrides it.
+    """
+    return int(os.environ.get("CV_REPORT_WORKERS", "0")) or min(os.cpu_count() or 2, max_workers)
+
+
+DEFAULT_REPORT_WORKERS = report_workers(int(os.environ.get("CV_MAX_WORKERS", "4")))
+
 # Use CSS variables in PDF generation
 KERMIT_COLORS = {
     'primary': HexColor('#FF6B35'),
@@ -18,7 +43,6 @@ KERMIT_COLORS = {
 }
 
 def create_pdf_styles():
-    print("Creating PDF styles with corporate colors...")
     styles = getSampleStyleSheet()
     styles.add(ParagraphStyle(
         'KermitTitle',
@@ -29,96 +53,44 @@ def create_pdf_styles():
     ))
     return styles
 
-# Updated styles with corporate colors
 
-def generate_pdf_report(data, output_dir):
-    # Initialize content list FIRST
-    content = []
-    PAGE_HEIGHT = 842  # A4 height in points (11.69 inches)
-    current_height = 0
-    MARGIN = 50
-    
-    # 1. Create document template
-    filename = f"{output_dir}/{data['name'].replace(' ', '_')}_report.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    
-    # 2. Define styles PROPERLY
-    styles = getSampleStyleSheet()
-    
-    # Create and register custom styles
-    custom_styles = {
-        'Title': ParagraphStyle(
+REPORT_TITLE = "Kermit Tech Candidate Report"
+CHART_WIDTH, CHART_HEIGHT = 300, 250
+
+
+class ReportTemplate:
+    """Paragraph and table styles shared by every report.
+
+    Built once per process by get_report_template(); styles are only read
+    while a story is laid out, so concurrent reports can share them.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title = ParagraphStyle(
             name='KermitTitle',
             parent=styles['Title'],
             textColor=colors.HexColor('#292929'),
             fontName='Helvetica-Bold',
             fontSize=14,
             alignment=TA_CENTER
-        ),
-        'Heading2': ParagraphStyle(
+        )
+        self.heading = ParagraphStyle(
             name='KermitHeading2',
             parent=styles['Heading2'],
             textColor=colors.HexColor('#FF6B35'),
             fontName='Helvetica-Bold',
             fontSize=12
-        ),
-        'Normal': ParagraphStyle(
+        )
+        self.normal = ParagraphStyle(
             name='KermitNormal',
             parent=styles['Normal'],
             textColor=colors.HexColor('#292929'),
             fontSize=10,
             leading=10
         )
-    }
-
-    print("Available custom styles:", list(custom_styles.keys()))
-
-    try:
-        print("title to be added")
-
-        # Add header with proper style reference
-        content.append(Paragraph("Kermit Tech Candidate Report", custom_styles['Title']))
-        content.append(Spacer(1, 5))
-        print("Generating PDF report...")
-    except KeyError as e:
-        raise RuntimeError(f"Missing style: {e}. Available styles: {list(custom_styles.keys())}") from e
-    
-    # Create document template
-    filename = f"{output_dir}/{data['name'].replace(' ', '_')}_report.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    
-   
-    # Add sections
-    sections = [
-        ("Candidate Name", data['name']),
-        ("Professional Summary", data['summary']),
-        ("Education", f"{data['education']['degree']} - {data['education']['university']}"),
-        ("Experience", f"Last Role: {data['experience']['last_title']} "),
-        ("Skills Analysis", "Ratings:")
-
-    ]
-    
-    for section in sections:
-        content.append(Paragraph(section[0], custom_styles['Heading2']))
-        content.append(Paragraph(section[1], custom_styles['Normal']))
-        content.append(Spacer(1, 5))
-    
-    # Add radar chart
-    chart_path = create_radar_chart(data['analysis'])
-    print("Radar chart path:", chart_path)
-    content.append(Image(chart_path, width=300, height=250))
-    content.append(Spacer(1, 5))
-    
-    # Add interview questions table
-    content.append(Paragraph("Interview Questions", custom_styles['Heading2']))
-    questions_table = Table(
-        [
-            [str(i+1), Paragraph(q, styles['Normal'])] 
-            for i, q in enumerate(data['interview_questions'])
-        ],
-        colWidths=[30, 300],
-        rowHeights=[None] * len(data['interview_questions']),  # Auto-height
-        style=[
+        self.question = styles['Normal']
+        self.questions_table = TableStyle([
             ('BACKGROUND', (0,0), (-1,0), KERMIT_COLORS['primary']),
             ('TEXTCOLOR', (0,0), (-1,0), colors.white),
             ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
@@ -126,73 +98,27 @@ def generate_pdf_report(data, output_dir):
             ('GRID', (0,0), (-1,-1), 1, KERMIT_COLORS['accent']),
             ('WORDWRAP', (1,0), (1,-1), 'CJK'),  # Enable word wrap
             ('VALIGN', (0,0), (-1,-1), 'TOP')     # Align content to top
-        ]
-    )
-    content.append(questions_table)
-    
-    # Build the PDF
-    doc.build(content)
-    print("PDF report generated successfully.")
-    print("PDF file path:", filename)
-    return filename
+        ])
 
-def generate_pdf_report_with_audio(data, adata, output_dir):
-    # Initialize content list FIRST
-    content = []
-    PAGE_HEIGHT = 842  # A4 height in points (11.69 inches)
-    current_height = 0
-    MARGIN = 50
-    
-    # 1. Create document template
-    filename = f"{output_dir}/{data['name'].replace(' ', '_')}_report.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    
-    # 2. Define styles PROPERLY
-    styles = getSampleStyleSheet()
-    
-    # Create and register custom styles
-    custom_styles = {
-        'Title': ParagraphStyle(
-            name='KermitTitle',
-            parent=styles['Title'],
-            textColor=colors.HexColor('#292929'),
-            fontName='Helvetica-Bold',
-            fontSize=14,
-            alignment=TA_CENTER
-        ),
-        'Heading2': ParagraphStyle(
-            name='KermitHeading2',
-            parent=styles['Heading2'],
-            textColor=colors.HexColor('#FF6B35'),
-            fontName='Helvetica-Bold',
-            fontSize=12
-        ),
-        'Normal': ParagraphStyle(
-            name='KermitNormal',
-            parent=styles['Normal'],
-            textColor=colors.HexColor('#292929'),
-            fontSize=10,
-            leading=10
-        )
-    }
 
-    print("Available custom styles:", list(custom_styles.keys()))
+_template = None
+_template_lock = threading.Lock()
 
-    try:
-        print("title to be added")
 
-        # Add header with proper style reference
-        content.append(Paragraph("Kermit Tech Candidate Report", custom_styles['Title']))
-        content.append(Spacer(1, 5))
-        print("Generating PDF report...")
-    except KeyError as e:
-        raise RuntimeError(f"Missing style: {e}. Available styles: {list(custom_styles.keys())}") from e
-    
-    # Create document template
-    filename = f"{output_dir}/{data['name'].replace(' ', '_')}_report.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    
-   
+def get_report_template():
+    """Process-wide report template"""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = ReportTemplate()
+        return _template
+
+
+def build_report_story(data, adata=None, template=None):
+    """Flowables of one candidate report; interview sections are added when adata is given"""
+    template = template or get_report_template()
+    content = [Paragraph(REPORT_TITLE, template.title), Spacer(1, 5)]
+
     # Add sections
     sections = [
         ("Candidate Name", data['name']),
@@ -200,58 +126,42 @@ def generate_pdf_report_with_audio(data, adata, output_dir):
         ("Education", f"{data['education']['degree']} - {data['education']['university']}"),
         ("Experience", f"Last Role: {data['experience']['last_title']} "),
         ("Skills Analysis", "Ratings:")
-
     ]
-    
-    for section in sections:
-        content.append(Paragraph(section[0], custom_styles['Heading2']))
-        content.append(Paragraph(section[1], custom_styles['Normal']))
+    for heading, text in sections:
+        content.append(Paragraph(heading, template.heading))
+        content.append(Paragraph(text, template.normal))
         content.append(Spacer(1, 5))
-    
+
     # Add radar chart
-    chart_path = create_radar_chart(data['analysis'])
-    print("Radar chart path:", chart_path)
-    content.append(Image(chart_path, width=300, height=250))
+    content.append(radar_drawing(data['analysis'], CHART_WIDTH, CHART_HEIGHT))
     content.append(Spacer(1, 5))
-    
 
     # Add interview questions table
-    content.append(Paragraph("Interview Questions", custom_styles['Heading2']))
-    questions_table = Table(
+    content.append(Paragraph("Interview Questions", template.heading))
+    content.append(Table(
         [
-            [str(i+1), Paragraph(q, styles['Normal'])] 
+            [str(i+1), Paragraph(q, template.question)]
             for i, q in enumerate(data['interview_questions'])
         ],
         colWidths=[30, 300],
         rowHeights=[None] * len(data['interview_questions']),  # Auto-height
-        style=[
-            ('BACKGROUND', (0,0), (-1,0), KERMIT_COLORS['primary']),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('ALIGN', (0,0), (0,-1), 'CENTER'),
-            ('GRID', (0,0), (-1,-1), 1, KERMIT_COLORS['accent']),
-            ('WORDWRAP', (1,0), (1,-1), 'CJK'),  # Enable word wrap
-            ('VALIGN', (0,0), (-1,-1), 'TOP')     # Align content to top
-        ]
-    )
-    content.append(questions_table)
-    
-    content.append(Paragraph("Skills Interview Analysis", custom_styles['Heading2']))
-    content.append(Paragraph("Interview Ratings:", custom_styles['Normal']))
-    content.append(Spacer(1, 5))
+        style=template.questions_table
+    ))
 
-    achart_path = create_radar_chart(adata['analysis'])
+    if adata is None:
+        return content
 
-    print("Interview Radar chart path:", achart_path)
-    content.append(Image(achart_path, width=300, height=250))
+    content.append(Paragraph("Skills Interview Analysis", template.heading))
+    content.append(Paragraph("Interview Ratings:", template.normal))
+    content.append(Spacer(1, 5))
+    content.append(radar_drawing(adata['analysis'], CHART_WIDTH, CHART_HEIGHT))
     content.append(Spacer(1, 5))
 
-    content.append(Paragraph("Concerns", custom_styles['Heading2']))
+    content.append(Paragraph("Concerns", template.heading))
     red_flag_items = [
-        ListItem(Paragraph(flag, custom_styles['Normal']), bulletColor='red') 
+        ListItem(Paragraph(flag, template.normal), bulletColor='red')
         for flag in adata['red_flags']
     ]
-
     content.append(ListFlowable(
         red_flag_items,
         bulletType='bullet',
@@ -261,29 +171,194 @@ def generate_pdf_report_with_audio(data, adata, output_dir):
     ))
     content.append(Spacer(1, 5))
 
-    content.append(Paragraph("Interview Summary", custom_styles['Heading2']))
-    content.append(Paragraph(adata['summary'], custom_styles['Normal']))
+    content.append(Paragraph("Interview Summary", template.heading))
+    content.append(Paragraph(adata['summary'], template.normal))
     content.append(Spacer(1, 5))
+    return content
+
+
+def render_pdf_report(data, adata=None):
+    """Build one candidate report in memory and return the PDF bytes"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    doc.build(build_report_story(data, adata))
+    return buffer.getvalue()
 
-    
-    # Build the PDF
-    doc.build(content)
-    print("PDF report generated successfully.")
-    print("PDF file path:", filename)
+
+def report_filename(data, adata=None):
+    """Candidate name plus a digest of the report content, so namesakes don't collide"""
+    digest = hashlib.sha256(
+        json.dumps([data, adata], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:10]
+    return f"{data['name'].replace(' ', '_').replace('/', '_')}_{digest}_report.pdf"
+
+
+def build_pdf_report(data, output_dir, adata=None):
+    """Write one candidate report (CV, plus interview when adata is given) and return its path"""
+    filename = os.path.join(output_dir, report_filename(data, adata))
+    with open(filename, "wb") as f:
+        f.write(render_pdf_report(data, adata))
+    logger.debug(f"PDF report generated: {filename}")
     return filename
 
 
-def combine_pdfs(pdf_paths):
-    """Combine multiple PDF files into one in memory"""
-    merger = PdfMerger()
-    
-    for pdf_path in pdf_paths:
-        with open(pdf_path, 'rb') as f:
-            merger.append(f)
-    
-    combined_buffer = BytesIO()
-    merger.write(combined_buffer)
-    merger.close()
-    
-    return combined_buffer.getvalue()
+def generate_pdf_report(data, output_dir):
+    return build_pdf_report(data, output_dir)
+
+
+def generate_pdf_report_with_audio(data, adata, output_dir):
+    return build_pdf_report(data, output_dir, adata)
+
+
+def _report_task(output_dir):
+    """Worker function: bytes, or a file written by the worker when output_dir is given"""
+    if output_dir is None:
+        return render_pdf_report
+    return functools.partial(_build_in, output_dir)
+
+
+def _build_in(output_dir, data, adata=None):
+    return build_pdf_report(data, output_dir, adata)
+
+
+class ReportPool:
+    """Renders reports in a pool of worker processes.
+
+    Reports come back as bytes, or with an output_dir the worker writes the
+    file and only its path crosses the process boundary. render() blocks the
+    calling thread only, so the pipeline's worker threads keep every process
+    busy. If the pool breaks (a worker killed by the OS) it is restarted once
+    and the report is otherwise rendered in-process.
+    """
+
+    def __init__(self, size=DEFAULT_REPORT_WORKERS, start_method="spawn"):
+        self.size = size
+        self._ctx = multiprocessing.get_context(start_method)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _submit(self, task, items):
+        """Submit every item to the current executor; returns (executor, futures).
+
+        Submission holds the lock, so resize() cannot retire the executor
+        in between.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.size, mp_context=self._ctx)
+            executor = self._executor
+            try:
+                return executor, [executor.submit(task, data, adata) for data, adata in items]
+            except BrokenProcessPool:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def _reset(self, executor):
+        if executor is None:
+            return  # already reset by _submit
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def resize(self, size):
+        """Use size processes for reports submitted from now on.
+
+        Reports already submitted finish in the old processes, which then exit.
+        """
+        with self._lock:
+            if size == self.size:
+                return
+            self.size = size
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def render(self, data, adata=None, output_dir=None):
+        """One report: PDF bytes, or the path of the file written under output_dir"""
+        task = _report_task(output_dir)
+        for _ in range(2):
+            executor = None
+            try:
+                executor, futures = self._submit(task, [(data, adata)])
+                return futures[0].result()
+            except BrokenProcessPool:
+                logger.warning("Report pool broke, restarting it")
+                self._reset(executor)
+        return task(data, adata)
+
+    def render_many(self, items, output_dir=None):
+        """Render [(data, adata), ...] in parallel; results (bytes or paths) in input order"""
+        task = _report_task(output_dir)
+        executor = None
+        try:
+            executor, futures = self._submit(task, items)
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            logger.warning("Report pool broke, rendering the batch one by one")
+            self._reset(executor)
+            return [self.render(data, adata, output_dir) for data, adata in items]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_report_pool = None
+_report_pool_lock = threading.Lock()
+
+
+def get_report_pool(size=None):
+    """Process-wide report pool, shut down at interpreter exit.
+
+    size (default DEFAULT_REPORT_WORKERS) creates the pool with that many
+    processes, or resizes an existing one; without it the pool keeps its size.
+    """
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ReportPool(size or DEFAULT_REPORT_WORKERS)
+            atexit.register(_report_pool.shutdown)
+        elif size:
+            _report_pool.resize(size)
+        return _report_pool
+
+
+def combine_pdfs(pdfs):
+    """Combine multiple PDFs (file paths or bytes) into one bytes object"""
+    combined_path = merge_reports(pdfs)
+    try:
+        with open(combined_path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(combined_path)
+
+
+def merge_reports(pdfs, titles=None, output_dir=None):
+    """Merge reports (file paths or bytes) into a PDF on disk with one bookmark each.
+
+    Sources are opened one at a time, but memory is not bounded: the
+    PdfWriter holds every merged page until write(), so it grows with the
+    batch (about one copy of the combined document). Merging in chunks would
+    not change that, since the last merge holds every page again, and a
+    single ReportLab document keeps its pages until save() too. Returns the
+    path of the merged file (created under output_dir, default the system
+    temp dir); the caller deletes it.
+    """
+    writer = PdfWriter()
+    for idx, pdf in enumerate(pdfs):
+        title = titles[idx] if titles else f"Report {idx + 1}"
+        if isinstance(pdf, (bytes, bytearray)):
+            writer.append(BytesIO(pdf), outline_item=title, import_outline=False)
+        else:
+            with open(pdf, 'rb') as f:
+                writer.append(f, outline_item=title, import_outline=False)
 
+    with tempfile.NamedTemporaryFile(prefix="cv_combined_", suffix=".pdf", dir=output_dir,
+                                     delete=False) as combined:
+        writer.write(combined)
+    writer.close()
+    return combined.name
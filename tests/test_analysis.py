@@ -0,0 +1,67 @@
+# tests/test_analysis.py
+import json
+
+import pytest
+
+import cv_processor
+from utils.cache import DiskCache
+
+
+class FakeClient:
+    model = "fake"
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def generate(self, prompt, format=None):
+        self.calls += 1
+        self.prompt = prompt
+        return json.dumps(self.answers.pop(0))
+
+
+@pytest.fixture(autouse=True)
+def analysis_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv_processor, "ANALYSIS_CACHE", DiskCache("analysis", root=str(tmp_path)))
+
+
+def test_malformed_cv_analysis_is_not_cached():
+    valid = cv_processor.mock_process_cv("cv.pdf", "Data Engineer")
+    client = FakeClient([{"name": "Jane"}, valid])
+    assert cv_processor.analyze_with_granite("cv", "", "Data Engineer", client=client) == {"name": "Jane"}
+    assert cv_processor.analyze_with_granite("cv", "", "Data Engineer", client=client) == valid
+    # The valid answer is cached
+    assert cv_processor.analyze_with_granite("cv", "", "Data Engineer", client=client) == valid
+    assert client.calls == 2
+
+
+def test_malformed_audio_analysis_is_not_cached():
+    valid = {"analysis": {"communication_score": 4}, "red_flags": [], "summary": "Clear"}
+    client = FakeClient([{"analysis": {}, "red_flags": "none"}, valid])
+    cv_processor.analyze_audio_with_granite("transcript", "", "Data Engineer", client=client)
+    assert cv_processor.analyze_audio_with_granite("transcript", "", "Data Engineer", client=client) == valid
+    assert cv_processor.analyze_audio_with_granite("transcript", "", "Data Engineer", client=client) == valid
+    assert client.calls == 2
+
+
+def test_validate_analysis_format_rejects_unscored_analysis():
+    valid = cv_processor.mock_process_cv("cv.pdf", "Data Engineer")
+    assert cv_processor.validate_analysis_format(valid)
+    assert not cv_processor.validate_analysis_format({"name": "Jane"})
+    assert not cv_processor.validate_analysis_format(dict(valid, analysis="strong"))
+    unscored = {key: "high" for key in valid["analysis"]}
+    assert not cv_processor.validate_analysis_format(dict(valid, analysis=unscored))
+
+
+def test_transcript_has_its_own_budget(monkeypatch):
+    valid = {"analysis": {"communication_score": 4}, "red_flags": [], "summary": "Clear"}
+    transcript = "word " * (cv_processor.CV_TEXT_BUDGET // 2)
+    client = FakeClient([valid, valid])
+    cv_processor.analyze_audio_with_granite(transcript, "", "Data Engineer", client=client)
+    assert client.prompt.endswith(transcript)
+
+    # The budget is part of the cache key, so another budget asks the model again
+    monkeypatch.setattr(cv_processor, "TRANSCRIPT_TEXT_BUDGET", len(transcript) - 10)
+    cv_processor.analyze_audio_with_granite(transcript, "", "Data Engineer", client=client)
+    assert client.calls == 2
+    assert not client.prompt.endswith(transcript)
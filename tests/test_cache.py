@@ -0,0 +1,86 @@
+# tests/test_cache.py
+import json
+import os
+import time
+
+from utils.cache import DiskCache, make_cache_key, env_flag
+
+
+def entry_size(cache, value):
+    cache.set("probe", value)
+    size = os.path.getsize(cache._path("probe"))
+    cache._remove(cache._path("probe"))
+    return size
+
+
+def test_make_cache_key_separates_parts():
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("a", 1) == make_cache_key("a", "1")
+
+
+def test_env_flag(monkeypatch):
+    monkeypatch.delenv("CV_TEST_FLAG", raising=False)
+    assert env_flag("CV_TEST_FLAG") is True
+    assert env_flag("CV_TEST_FLAG", default=False) is False
+    for value, expected in [("off", False), ("0", False), ("No", False), ("on", True), ("yes", True)]:
+        monkeypatch.setenv("CV_TEST_FLAG", value)
+        assert env_flag("CV_TEST_FLAG", default=False) is expected
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = DiskCache("t", root=str(tmp_path))
+    assert cache.get("k") is None
+    cache.set("k", {"a": [1, 2]})
+    assert cache.get("k") == {"a": [1, 2]}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = DiskCache("t", root=str(tmp_path), enabled=False)
+    cache.set("k", 1)
+    assert cache.get("k") is None
+    assert not os.path.exists(cache.directory)
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path):
+    cache = DiskCache("t", root=str(tmp_path), ttl_seconds=60)
+    cache.set("k", "value")
+    path = cache._path("k")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.time() - 120, "value": "value"}, f)
+    assert cache.get("k") is None
+    assert not os.path.exists(path)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    value = "x" * 200
+    probe = DiskCache("t", root=str(tmp_path))
+    size = entry_size(probe, value)
+    cache = DiskCache("t", root=str(tmp_path), max_bytes=int(size * 3.5))
+
+    now = time.time()
+    for i, key in enumerate(["k0", "k1", "k2"]):
+        cache.set(key, value)
+        os.utime(cache._path(key), (now - 100 + i, now - 100 + i))
+    assert cache.get("k0") == value  # k0 is now the most recently used
+
+    cache.set("k3", value)
+    assert cache.evictions == 1
+    assert cache.get("k1") is None
+    assert all(cache.get(key) == value for key in ["k0", "k2", "k3"])
+
+
+def test_running_size_avoids_rescans(tmp_path):
+    cache = DiskCache("t", root=str(tmp_path), max_bytes=10 * 1024 * 1024, rescan_every=1000)
+    scans = []
+    evict = cache._evict
+    cache._evict = lambda: (scans.append(1), evict())
+    for i in range(50):
+        cache.set(f"k{i}", i)
+    cache.set("k0", "overwritten")
+    assert len(scans) == 1  # only the first write, to learn the size
+    on_disk = sum(e.stat().st_size for e in os.scandir(cache.directory) if e.name.endswith(".json"))
+    assert cache._size == on_disk
+
+    cache.clear()
+    assert cache._size == 0
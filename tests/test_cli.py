@@ -0,0 +1,39 @@
+# tests/test_cli.py
+import json
+
+import cli
+
+RESULT = {"name": "Jane", "analysis": {"technical_experience": 4}}
+
+
+def run_cli(tmp_path, monkeypatch, outcome):
+    cv = tmp_path / "cv.pdf"
+    cv.write_bytes(b"%PDF-1.4")
+
+    def fake_batch(files, reports_dir, job_category, on_progress=None, **kwargs):
+        on_progress(0, dict(outcome))
+        return [outcome]
+
+    monkeypatch.setattr(cli, "process_batch", fake_batch)
+    out = tmp_path / "out"
+    cli.main([str(cv), "-j", "Data Engineer", "-o", str(out), "--no-resume", "--no-dedup"])
+    with open(out / "results.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def outcome(resumed):
+    return {"name": "cv.pdf", "file_path": None, "result": RESULT, "pdf_path": None,
+            "error": None, "resumed": resumed, "skipped": False}
+
+
+def test_resumed_job_without_a_record_is_written(tmp_path, monkeypatch):
+    # An earlier run crashed after the analysis, before writing results.jsonl
+    records = run_cli(tmp_path, monkeypatch, outcome(resumed=True))
+    assert len(records) == 1
+    assert records[0]["result"] == RESULT
+
+
+def test_resumed_job_with_a_record_is_not_written_twice(tmp_path, monkeypatch):
+    run_cli(tmp_path, monkeypatch, outcome(resumed=False))
+    records = run_cli(tmp_path, monkeypatch, outcome(resumed=True))
+    assert len(records) == 1
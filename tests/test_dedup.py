@@ -0,0 +1,119 @@
+# tests/test_dedup.py
+import time
+
+import pytest
+
+from dedup import DuplicateIndex
+from job_store import JobStore, ANALYSED
+from pipeline import link_duplicates
+from cv_processor import analysis_key
+from utils import file_sha256
+
+BASE = " ".join(f"word{i}" for i in range(300))
+
+
+def write_cvs(directory, texts, prefix="cv"):
+    """Files whose content hash differs per file, with the given extracted texts"""
+    directory.mkdir(exist_ok=True)
+    loaded = []
+    for i, text in enumerate(texts):
+        path = directory / f"{prefix}{i}.pdf"
+        path.write_text(f"{prefix}{i}\n{text}")
+        loaded.append((str(path), text))
+    return [path for path, _ in loaded], loaded
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = DuplicateIndex(str(tmp_path / "dedup.sqlite3"))
+    yield idx
+    idx.close()
+
+
+def test_near_duplicate_links_to_earlier_cv_in_batch(tmp_path, index):
+    files, loaded = write_cvs(tmp_path, [BASE, BASE + " extra", "something else entirely " * 20])
+    links = link_duplicates(files, loaded, index, "Data Engineer")
+    assert links[0] is None
+    assert links[1]["index"] == 0 and links[1]["job"] is None
+    assert links[2] is None
+
+
+def test_own_hash_match_stops_the_search(tmp_path, index):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    files, loaded = write_cvs(tmp_path, [BASE, BASE + " extra"])
+    link_duplicates(files, loaded, index, "Data Engineer", store)
+    for path, name in zip(files, ["Original", "Copy"]):
+        store.mark(file_sha256(path), "Data Engineer", ANALYSED,
+                   result={"name": name}, analysis_key=analysis_key())
+
+    # The first file again in a later run resumes its own analysis, not the second's
+    assert link_duplicates(files[:1], loaded[:1], index, "Data Engineer", store) == [None]
+    store.close()
+
+
+def test_rerun_keeps_links_and_new_category_relinks(tmp_path, index):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    files, loaded = write_cvs(tmp_path, [BASE, BASE + " extra", "something else entirely " * 20])
+
+    def run(job_category):
+        links = link_duplicates(files, loaded, index, job_category, store)
+        for path, link in zip(files, links):
+            if link is None:  # what process_single_cv stores for a representative
+                store.mark(file_sha256(path), job_category, ANALYSED,
+                           result={"name": path}, analysis_key=analysis_key())
+        return links
+
+    first = run("Data Engineer")
+    assert [link and link["index"] for link in first] == [None, 0, None]
+    # The same batch again: representatives resume, the copy is still linked
+    again = run("Data Engineer")
+    assert [link and link["index"] for link in again] == [None, 0, None]
+    # No analyses under another category yet, so the batch links as on the first run
+    other = run("Data Analyst")
+    assert [link and link["index"] for link in other] == [None, 0, None]
+    store.close()
+
+
+def test_batch_representative_found_beyond_query_limit(tmp_path, index):
+    # More archived exact matches than the query limit, none with a stored analysis
+    archive_files, archive_loaded = write_cvs(tmp_path, [BASE] * 8, prefix="archive")
+    link_duplicates(archive_files, archive_loaded, index, "Data Engineer")
+
+    variant = BASE + " " + " ".join(f"other{i}" for i in range(10))
+    files, loaded = write_cvs(tmp_path, [variant, BASE])
+    links = link_duplicates(files, loaded, index, "Data Engineer")
+    assert links[0] is None
+    assert links[1]["index"] == 0
+
+
+def test_links_archived_cv_with_stored_analysis(tmp_path, index):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    old_files, old_loaded = write_cvs(tmp_path, [BASE], prefix="old")
+    link_duplicates(old_files, old_loaded, index, "Data Engineer", store)
+    store.mark(file_sha256(old_files[0]), "Data Engineer", ANALYSED,
+               result={"name": "Old"}, analysis_key=analysis_key())
+
+    files, loaded = write_cvs(tmp_path, [BASE + " updated"])
+    links = link_duplicates(files, loaded, index, "Data Engineer", store)
+    assert links[0]["index"] is None
+    assert links[0]["job"]["result"] == {"name": "Old"}
+    store.close()
+
+
+def test_prune_by_age_and_count(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    index = DuplicateIndex(path)
+    for i in range(5):
+        index.add(f"doc{i}", index.signature(f"{BASE} doc{i}"))
+    index._conn.execute("UPDATE docs SET added_at = ? WHERE doc_id = 'doc0'", (time.time() - 1000,))
+    index._conn.commit()
+    assert index.prune(max_age=500) == 1
+    assert index.prune(max_docs=2) == 2
+    assert index.count() == 2
+    assert index._conn.execute("SELECT COUNT(DISTINCT doc_id) FROM buckets").fetchone()[0] == 2
+    index.close()
+
+    # Opening the index prunes with the given limits
+    reopened = DuplicateIndex(path, max_docs=1)
+    assert reopened.count() == 1
+    reopened.close()
@@ -0,0 +1,84 @@
+# tests/test_job_store.py
+import sqlite3
+
+import pytest
+
+from job_store import JobStore, QUEUED, EXTRACTED, ANALYSED, REPORTED, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_unknown_job_is_none(store):
+    assert store.get("h", "Data Engineer") is None
+
+
+def test_lifecycle_keeps_result_and_counts_attempts(store):
+    store.mark("h", "Data Engineer", QUEUED, file_name="cv.pdf", analysis_key="k")
+    store.mark("h", "Data Engineer", EXTRACTED)
+    store.mark("h", "Data Engineer", ANALYSED, result={"name": "Jane"})
+    store.mark("h", "Data Engineer", REPORTED, report_path="/tmp/r.pdf")
+
+    job = store.get("h", "Data Engineer")
+    assert job["state"] == REPORTED
+    assert job["file_name"] == "cv.pdf"
+    assert job["result"] == {"name": "Jane"}
+    assert job["report_path"] == "/tmp/r.pdf"
+    assert job["attempts"] == 1
+    assert job["analysis_key"] == "k"
+
+
+def test_failure_then_retry(store):
+    store.mark("h", "Data Engineer", QUEUED)
+    store.mark("h", "Data Engineer", FAILED, error="Ollama is down")
+    assert store.get("h", "Data Engineer")["error"] == "Ollama is down"
+
+    store.mark("h", "Data Engineer", QUEUED)
+    job = store.get("h", "Data Engineer")
+    assert job["state"] == QUEUED
+    assert job["error"] is None
+    assert job["attempts"] == 2
+
+
+def test_jobs_are_per_job_category(store):
+    store.mark("h", "Data Engineer", ANALYSED, result={"a": 1})
+    assert store.get("h", "Data Analyst") is None
+    assert store.counts("Data Engineer")[ANALYSED] == 1
+    assert store.counts("Data Analyst")[ANALYSED] == 0
+    assert [job["content_hash"] for job in store.list_jobs(states=[ANALYSED])] == ["h"]
+
+
+def test_other_analysis_key_is_not_found(store):
+    store.mark("h", "Data Engineer", QUEUED, analysis_key="old-prompt")
+    store.mark("h", "Data Engineer", ANALYSED, result={"a": 1})
+    assert store.get("h", "Data Engineer", "old-prompt")["result"] == {"a": 1}
+    assert store.get("h", "Data Engineer", "new-prompt") is None
+
+
+def test_unknown_state_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.mark("h", "Data Engineer", "done")
+
+
+def test_store_without_analysis_key_column_is_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            content_hash TEXT NOT NULL, job_category TEXT NOT NULL, file_name TEXT,
+            state TEXT NOT NULL, result_json TEXT, report_path TEXT, error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL,
+            PRIMARY KEY (content_hash, job_category))
+    """)
+    conn.execute("INSERT INTO jobs VALUES ('h', 'c', NULL, 'analysed', '{}', NULL, NULL, 1, 0)")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    assert store.get("h", "c")["analysis_key"] is None
+    assert store.get("h", "c", "k") is None  # analysed under an unknown prompt/model
+    store.close()
@@ -0,0 +1,83 @@
+# tests/test_json_stream.py
+import json
+
+import pytest
+
+from utils.json_stream import IncrementalJSONParser, SchemaMismatch
+from cv_processor import ANALYSIS_SCHEMA, parse_model_json
+
+ANSWER = {
+    "name": "Jane {Doe}",
+    "education": {"degree": "BSc", "university": "U \"quoted\""},
+    "experience": {"last_title": "Engineer"},
+    "analysis": {"technical_experience": 4, "project_relevance": 3},
+    "summary": "Strong [data] background",
+    "interview_questions": ["Why?", "How?"],
+}
+
+
+def feed_in_chunks(parser, text, size):
+    fields = []
+    for i in range(0, len(text), size):
+        fields += parser.feed(text[i:i + size])
+    return fields
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_fields_complete_in_order_whatever_the_chunking(size):
+    parser = IncrementalJSONParser(ANALYSIS_SCHEMA)
+    fields = feed_in_chunks(parser, json.dumps(ANSWER, indent=2), size)
+    assert [key for key, _ in fields] == list(ANSWER)
+    assert parser.complete
+    assert parser.fields == ANSWER
+    assert parser.missing_keys() == []
+
+
+def test_field_is_emitted_before_the_object_closes():
+    parser = IncrementalJSONParser(ANALYSIS_SCHEMA)
+    assert parser.feed('{"name": "Jane", "summ') == [("name", "Jane")]
+    assert not parser.complete
+    assert parser.missing_keys() == ["education", "experience", "analysis", "summary",
+                                     "interview_questions"]
+
+
+def test_numbers_and_literals_at_top_level():
+    parser = IncrementalJSONParser()
+    fields = feed_in_chunks(parser, '{"a": 1.5, "b": true, "c": null}', 2)
+    assert fields == [("a", 1.5), ("b", True), ("c", None)]
+    assert parser.complete
+
+
+def test_unknown_keys_are_skipped():
+    answer = dict(ANSWER, confidence={"overall": 0.9}, notes="extra")
+    parser = IncrementalJSONParser(ANALYSIS_SCHEMA)
+    fields = feed_in_chunks(parser, json.dumps(answer), 5)
+    assert [key for key, _ in fields] == list(ANSWER)
+    assert parser.complete
+    assert parser.fields == ANSWER
+
+
+def test_wrong_type_aborts_immediately():
+    parser = IncrementalJSONParser(ANALYSIS_SCHEMA)
+    with pytest.raises(SchemaMismatch):
+        parser.feed('{"name": ["not", "a", "string"],')
+
+
+@pytest.mark.parametrize("encode", [
+    lambda text: json.dumps(text),          # the object as a JSON string
+    lambda text: text.replace('"', '\\"'),  # escaped quotes
+])
+def test_double_encoded_output_falls_back_to_lenient_parser(encode):
+    raw = encode(json.dumps(ANSWER))
+    parser = IncrementalJSONParser(ANALYSIS_SCHEMA)
+    assert feed_in_chunks(parser, raw, 7) == []
+    assert not parser.complete
+    assert parser.malformed
+    assert parser.text == raw
+    assert parse_model_json(parser.text)["name"] == ANSWER["name"]
+
+
+def test_trailing_data_marks_output_malformed():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} trailing')
+    assert parser.malformed
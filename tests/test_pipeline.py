@@ -0,0 +1,69 @@
+# tests/test_pipeline.py
+import threading
+import time
+
+import pytest
+
+import pipeline
+
+
+@pytest.fixture
+def cvs(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"cv{i}.pdf"
+        path.write_text(f"cv{i}")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def fake_process_cv(monkeypatch):
+    state = {"active": 0, "peak": 0, "threads": set()}
+    lock = threading.Lock()
+
+    def process_cv(file_path, job_category, use_cache=True, on_field=None, on_stage=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            state["threads"].add(threading.get_ident())
+        try:
+            index = int(file_path[-5])
+            # Later uploads finish first
+            time.sleep(0.02 * (8 - index))
+            if on_field:
+                on_field("name", f"Candidate {index}")
+            return {"name": f"Candidate {index}"}
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    monkeypatch.setattr(pipeline, "process_cv", process_cv)
+    return state
+
+
+def test_results_come_back_in_upload_order(tmp_path, cvs, fake_process_cv):
+    outcomes = pipeline.process_batch(cvs, str(tmp_path), "Data Engineer",
+                                      max_workers=4, build_report=False)
+    assert [o["result"]["name"] for o in outcomes] == [f"Candidate {i}" for i in range(8)]
+    assert [o["name"] for o in outcomes] == [f"cv{i}.pdf" for i in range(8)]
+
+
+def test_concurrency_is_bounded_by_max_workers(tmp_path, cvs, fake_process_cv):
+    pipeline.process_batch(cvs, str(tmp_path), "Data Engineer", max_workers=3, build_report=False)
+    assert 1 < fake_process_cv["peak"] <= 3
+
+
+def test_callbacks_run_on_the_calling_thread(tmp_path, cvs, fake_process_cv):
+    caller = threading.get_ident()
+    progress, fields = [], []
+    pipeline.process_batch(
+        cvs, str(tmp_path), "Data Engineer", max_workers=4, build_report=False,
+        on_progress=lambda idx, outcome: progress.append((idx, threading.get_ident())),
+        on_field=lambda idx, key, value: fields.append((idx, value, threading.get_ident())))
+
+    assert caller not in fake_process_cv["threads"]
+    assert sorted(idx for idx, _ in progress) == list(range(8))
+    assert sorted((idx, value) for idx, value, _ in fields) == [(i, f"Candidate {i}") for i in range(8)]
+    assert {thread for _, thread in progress} == {caller}
+    assert {thread for _, _, thread in fields} == {caller}
@@ -0,0 +1,53 @@
+# tests/test_prescreen.py
+import numpy as np
+import pytest
+
+from prescreen import score_texts, select, rank, tokenize
+
+
+def test_tokenize_folds_plurals_and_adds_bigrams():
+    assert tokenize("Data Pipelines") == ["data", "pipeline", "data pipeline"]
+
+
+def test_scores_rank_relevant_cvs_higher():
+    scores = score_texts([
+        "Built Spark and Airflow ETL data pipelines on Snowflake with SQL and Python",
+        "Designed wireframes in Figma",
+        "",
+    ], "Data Engineer")
+    values = [s["score"] for s in scores]
+    assert values[0] > values[1] >= values[2] == 0
+    assert scores[0]["matched"][0] in ("spark", "airflow", "etl", "data pipeline")
+
+
+def test_repeating_a_keyword_saturates():
+    once = score_texts(["python"], "Data Engineer")[0]["score"]
+    many = score_texts(["python " * 50], "Data Engineer")[0]["score"]
+    assert many < once * 2
+
+
+def test_keywords_beyond_the_llm_budget_count():
+    padding = "lorem ipsum " * 400
+    assert score_texts([padding + "spark airflow"], "Data Engineer")[0]["score"] > 0
+
+
+def test_unknown_job_category():
+    with pytest.raises(ValueError):
+        score_texts(["python"], "Astronaut")
+
+
+def test_select_top_k_keeps_upload_order_on_ties():
+    assert select([0.5, 0.9, 0.5, 0.1], top_k=2).tolist() == [True, True, False, False]
+
+
+def test_select_min_score_and_top_k_combined():
+    scores = [0.2, 0.9, 0.5, 0.7]
+    assert select(scores, min_score=0.5).tolist() == [False, True, True, True]
+    assert select(scores, top_k=2, min_score=0.5).tolist() == [False, True, False, True]
+    assert select(scores, top_k=0).tolist() == [False] * 4
+    assert select(scores).all()
+
+
+def test_rank_is_one_based_highest_first():
+    assert rank([0.1, 0.9, 0.5]).tolist() == [3, 1, 2]
+    assert rank(np.array([0.5, 0.5])).tolist() == [1, 2]
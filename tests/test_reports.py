@@ -0,0 +1,58 @@
+# tests/test_reports.py
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PyPDF2 import PdfReader
+
+import report_generator
+from report_generator import ReportPool, render_pdf_report
+from utils.visualization import radar_drawing, _radar_geometry
+
+RESULT = {
+    "name": "Jane Doe",
+    "summary": "Strong data background",
+    "education": {"degree": "BSc", "university": "U"},
+    "experience": {"last_title": "Engineer"},
+    "analysis": {"technical_experience": 4, "project_relevance": 3, "communication": 5},
+    "interview_questions": ["Why?"],
+}
+
+
+def test_radar_drawing_is_a_new_instance_per_call():
+    _radar_geometry.cache_clear()
+    first = radar_drawing(RESULT["analysis"])
+    second = radar_drawing(RESULT["analysis"])
+    assert first is not second
+    assert _radar_geometry.cache_info().hits == 1
+    assert len(first.contents) == len(second.contents)
+
+
+def test_reports_with_identical_scores_render_concurrently():
+    # Same score vector everywhere, so every report hits the memoized geometry
+    results = [dict(RESULT, name=f"Candidate {i}") for i in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pdfs = list(pool.map(render_pdf_report, results))
+    for pdf in pdfs:
+        assert pdf.startswith(b"%PDF")
+        assert len(PdfReader(BytesIO(pdf)).pages) >= 1
+
+
+def test_report_pool_resize_applies_to_later_reports(tmp_path):
+    pool = ReportPool(1)
+    try:
+        first = pool.render(RESULT, output_dir=str(tmp_path))
+        pool.resize(2)
+        paths = pool.render_many([(dict(RESULT, name=f"Candidate {i}"), None) for i in range(2)],
+                                 output_dir=str(tmp_path))
+        assert pool._executor._max_workers == 2
+        for path in [first] + paths:
+            with open(path, "rb") as f:
+                assert f.read(4) == b"%PDF"
+    finally:
+        pool.shutdown()
+
+
+def test_get_report_pool_size_resizes_the_shared_pool(monkeypatch):
+    monkeypatch.setattr(report_generator, "_report_pool", ReportPool(1))
+    assert report_generator.get_report_pool().size == 1
+    assert report_generator.get_report_pool(3).size == 3
@@ -1,4 +1,5 @@
 from .file_handlers import (
     save_uploaded_file,
-    extract_cv_text
+    extract_cv_text,
+    file_sha256
 )
@@ -0,0 +1,179 @@
+# utils/cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ROOT = os.environ.get(
+    "CV_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cv_analyser")
+)
+
+
+def env_flag(name: str, default: bool = True) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "off", "no")
+
+
+def make_cache_key(*parts) -> str:
+    """SHA-256 over the given parts (str/bytes), separated so ('ab','c') != ('a','bc')"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Content-addressed JSON cache on disk with size-based LRU eviction and TTL.
+
+    Each entry is one file named by its key. Access time is tracked through the
+    file mtime, so the least recently used entries are evicted first once the
+    namespace grows past max_bytes. The namespace size is tracked as entries
+    are written and removed; the directory is only scanned when that total
+    goes over budget, and every rescan_every writes to pick up other processes.
+    Eviction goes down to low_water of the budget, so scans stay occasional.
+    """
+
+    def __init__(self, namespace: str, max_bytes: int = 100 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None, root: str = DEFAULT_CACHE_ROOT,
+                 enabled: bool = True, rescan_every: int = 256, low_water: float = 0.9):
+        self.namespace = namespace
+        self.directory = os.path.join(root, namespace)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rescan_every = rescan_every
+        self.low_water = low_water
+        self._size: Optional[int] = None  # bytes on disk; None until the first scan
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on miss/expiry/bypass"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path, None)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value and evict LRU entries if over budget"""
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "value": value}, f)
+            new_size = os.path.getsize(tmp_path)
+            old_size = self._file_size(path)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._writes += 1
+                if self._size is not None:
+                    self._size += new_size - old_size
+                scan = (self._size is None or self._size > self.max_bytes
+                        or self._writes % self.rescan_every == 0)
+            if scan:
+                self._evict()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Cache write failed ({self.namespace}): {str(e)}")
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path: str) -> None:
+        size = self._file_size(path)
+        try:
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size = max(self._size - size, 0)
+
+    def _evict(self) -> None:
+        """Rescan the namespace; if over max_bytes, drop LRU entries down to the low-water mark"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    self.evictions += 1
+                    total -= size
+                    if total <= self.max_bytes * self.low_water:
+                        break
+            self._size = total
+
+    def clear(self) -> None:
+        """Drop every entry in this namespace"""
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                self._remove(entry.path)
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,186 @@
+# utils/extraction_pool.py
+import os
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.environ.get("CV_EXTRACTION_WORKERS", "2"))
+DEFAULT_TIMEOUT = float(os.environ.get("CV_EXTRACTION_TIMEOUT", "60"))
+DEFAULT_MEMORY_MB = int(os.environ.get("CV_EXTRACTION_MEMORY_MB", "1024"))
+
+
+class ExtractionError(ValueError):
+    """Structured extraction failure: kind is 'timeout', 'memory', 'crashed' or 'error'"""
+
+    def __init__(self, kind: str, file_path: str, message: str):
+        super().__init__(f"Extraction {kind} for {os.path.basename(file_path)}: {message}")
+        self.kind = kind
+        self.file_path = file_path
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "file": self.file_path, "message": self.message}
+
+
+def _limit_memory(memory_limit_mb: Optional[int]) -> None:
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # Not available on Windows; the wall-clock timeout still applies
+        logger.warning(f"Could not set extraction memory limit: {str(e)}")
+
+
+def _worker_main(conn, memory_limit_mb: Optional[int]) -> None:
+    """Worker loop: receive (path, max_chars), send back (status, payload)"""
+    _limit_memory(memory_limit_mb)
+    from utils.file_handlers import extract_cv_text
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        file_path, max_chars = task
+        try:
+            conn.send(("ok", extract_cv_text(file_path, max_chars)))
+        except MemoryError:
+            conn.send(("memory", f"exceeded {memory_limit_mb} MB"))
+            return  # heap may be fragmented, let the pool start a fresh worker
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, ctx, memory_limit_mb: Optional[int]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit_mb),
+                                   daemon=True, name="cv-extract")
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        finally:
+            self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=2)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.kill()
+
+
+class ExtractionPool:
+    """Pool of extraction processes with per-document wall-clock and memory limits.
+
+    A worker that times out or dies is killed and replaced on the next
+    request, so one pathological PDF cannot stall the Streamlit process.
+    """
+
+    def __init__(self, size: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT,
+                 memory_limit_mb: Optional[int] = DEFAULT_MEMORY_MB,
+                 max_tasks_per_worker: int = 100, start_method: str = "spawn"):
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._ctx = multiprocessing.get_context(start_method)
+        # None marks a free slot whose worker is started on first use
+        self._slots: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+        self._workers = set()
+        self._lock = threading.Lock()
+        self.recycled = 0
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.memory_limit_mb)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            self.recycled += 1
+
+    def extract(self, file_path: str, max_chars: Optional[int] = None) -> str:
+        """Run extract_cv_text in a worker process; raises ExtractionError on failure"""
+        worker = self._slots.get()
+        try:
+            if worker is None or not worker.alive():
+                if worker is not None:
+                    self._discard(worker)
+                worker = self._spawn()
+
+            worker.conn.send((file_path, max_chars))
+            if not worker.conn.poll(self.timeout):
+                self._discard(worker)
+                worker = None
+                raise ExtractionError("timeout", file_path, f"no result after {self.timeout:.0f}s")
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                exitcode = worker.process.exitcode
+                self._discard(worker)
+                worker = None
+                raise ExtractionError("crashed", file_path, f"worker exited with code {exitcode}")
+
+            worker.tasks += 1
+            if status == "memory":
+                self._discard(worker)
+                worker = None
+                raise ExtractionError("memory", file_path, payload)
+            if status == "error":
+                raise ExtractionError("error", file_path, payload)
+            return payload
+        finally:
+            if worker is not None and worker.tasks >= self.max_tasks_per_worker:
+                # Recycle long-lived workers to return leaked parser memory
+                worker.stop()
+                with self._lock:
+                    self._workers.discard(worker)
+                worker = None
+            self._slots.put(worker)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+_default_pool: Optional[ExtractionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Process-wide extraction pool, shut down at interpreter exit"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ExtractionPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
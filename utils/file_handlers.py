@@ -1,69 +1,170 @@
 import os
 import uuid
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
 import pdfplumber
 from PyPDF2 import PdfReader
 from PyPDF2.errors import PdfReadError
 from docx import Document
 
+# PDF text extractor: "pdfplumber" (default, best layout handling), "pypdf",
+# or "auto" (PyPDF2 when page one already has a text layer)
+PDF_EXTRACTOR = os.environ.get("CV_PDF_EXTRACTOR", "pdfplumber").lower()
+
 # Helper functions first
-def _extract_pdf_text(file_path: str) -> str:
-    """PDF text extraction helper"""
-    print("__ Extracting PDF text from:", file_path)
+def _iter_pdf_pages_pypdf(file_path: str, first_page: Optional[str] = None) -> Iterator[str]:
+    """Yield page text with PyPDF2, one page at a time (first_page: page one already extracted)"""
+    with open(file_path, 'rb') as f:
+        pdf = PdfReader(f)
+        for idx, page in enumerate(pdf.pages):
+            if idx == 0 and first_page is not None:
+                yield first_page
+                continue
+            yield page.extract_text() or ''
+
+def _iter_pdf_pages_plumber(file_path: str) -> Iterator[str]:
+    """Yield page text with pdfplumber, releasing each page's objects after use"""
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ''
+            page.flush_cache()
+
+def _probe_pdf(file_path: str) -> Tuple[str, Optional[str]]:
+    """For "auto": PyPDF2 when the first page already has a text layer.
+
+    PyPDF2 only parses what it touches, so reading page one is quick; pdfplumber
+    (pdfminer layout analysis) is kept for PDFs where PyPDF2 finds nothing.
+    Returns (extractor, page one text when PyPDF2 was picked) so page one is
+    not extracted twice.
+    """
     try:
-        with pdfplumber.open(file_path) as pdf:
-            text = "\n".join([page.extract_text() or '' for page in pdf.pages])
-            print("_loop1")
-            print("__ Extracted text:")
-            if text.strip():
-                return text.strip()
-        
-        # Fallback to PyPDF2
         with open(file_path, 'rb') as f:
             pdf = PdfReader(f)
-            text = "\n".join([page.extract_text() or '' for page in pdf.pages])
-            print("__ Extracted text (PyPDF2):", text[:100])
-            return text.strip()
+            if pdf.is_encrypted or not pdf.pages:
+                return "pdfplumber", None
+            first_page = pdf.pages[0].extract_text() or ''
+            return ("pypdf", first_page) if first_page.strip() else ("pdfplumber", None)
+    except Exception:
+        return "pdfplumber", None
+
+def _collect_pages(pages: Iterator[str], max_chars: Optional[int]) -> str:
+    """Join pages until the character budget is reached, then stop parsing"""
+    parts = []
+    total = 0
+    try:
+        for page_text in pages:
+            parts.append(page_text)
+            total += len(page_text) + 1
+            if max_chars is not None and total >= max_chars:
+                break
+    finally:
+        pages.close()
+    return "\n".join(parts).strip()
+
+def _extract_pdf_text(file_path: str, max_chars: Optional[int] = None) -> str:
+    """PDF text extraction helper.
+
+    Pages are read lazily until max_chars is reached with PDF_EXTRACTOR; the
+    other extractor is only tried if that one yields no text.
+    """
+    print("__ Extracting PDF text from:", file_path)
+    try:
+        extractors = {"pypdf": _iter_pdf_pages_pypdf, "pdfplumber": _iter_pdf_pages_plumber}
+        first, first_page = PDF_EXTRACTOR, None
+        if first == "auto":
+            first, first_page = _probe_pdf(file_path)
+        elif first not in extractors:
+            first = "pdfplumber"
+        fallback = "pdfplumber" if first == "pypdf" else "pypdf"
+        logging.debug(f"PDF extractor: {first}")
+
+        if first_page is not None:
+            pages = _iter_pdf_pages_pypdf(file_path, first_page=first_page)
+        else:
+            pages = extractors[first](file_path)
+        text = _collect_pages(pages, max_chars)
+        if text:
+            return text
+
+        text = _collect_pages(extractors[fallback](file_path), max_chars)
+        logging.debug(f"Extracted text ({fallback}): {text[:100]}")
+        return text
             
     except PdfReadError:
         raise ValueError("PDF is encrypted or corrupted")
     except Exception as e:
         raise ValueError(f"PDF processing error: {str(e)}")
 
-def _extract_docx_text(file_path: str) -> str:
+def _extract_docx_text(file_path: str, max_chars: Optional[int] = None) -> str:
     """DOCX text extraction helper"""
     try:
         doc = Document(file_path)
-        return "\n".join([para.text for para in doc.paragraphs]).strip()
+        return _collect_pages((para.text for para in doc.paragraphs), max_chars)
     except Exception as e:
         raise ValueError(f"DOCX processing error: {str(e)}")
 
+# Digests computed while saving uploads, so they are never hashed twice
+# (bounded LRU: a long-running server saves an unbounded number of uploads)
+SAVED_DIGESTS_SIZE = int(os.environ.get("CV_SAVED_DIGESTS_SIZE", "4096"))
+_saved_digests: "OrderedDict[str, str]" = OrderedDict()
+_saved_digests_lock = threading.Lock()
+
 # Main functions
-def save_uploaded_file(uploaded_file, temp_dir: str) -> str:
-    """Save uploaded file with UUID filename"""
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in chunks (free for files saved by save_uploaded_file)"""
+    path = os.path.abspath(file_path)
+    with _saved_digests_lock:
+        known = _saved_digests.get(path)
+        if known:
+            _saved_digests.move_to_end(path)
+    if known:
+        return known
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_uploaded_file(uploaded_file, temp_dir: str, chunk_size: int = 1024 * 1024) -> str:
+    """Save uploaded file with UUID filename, hashing the bytes as they are written"""
     try:
         file_ext = os.path.splitext(uploaded_file.name)[1].lower()
         file_name = f"{uuid.uuid4()}{file_ext}"
         file_path = os.path.join(temp_dir, file_name)
-        
+
+        buffer = uploaded_file.getbuffer()
+        digest = hashlib.sha256()
         with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-            
+            for offset in range(0, len(buffer), chunk_size):
+                chunk = buffer[offset:offset + chunk_size]
+                digest.update(chunk)
+                f.write(chunk)
+
+        with _saved_digests_lock:
+            _saved_digests[os.path.abspath(file_path)] = digest.hexdigest()
+            while len(_saved_digests) > SAVED_DIGESTS_SIZE:
+                _saved_digests.popitem(last=False)
         return file_path
         
     except Exception as e:
         logging.error(f"File save error: {str(e)}")
         raise
 
-def extract_cv_text(file_path: str) -> str:
-    """Main text extraction function"""
+def extract_cv_text(file_path: str, max_chars: Optional[int] = None) -> str:
+    """Main text extraction function.
+
+    With max_chars, extraction stops once that much text has been collected.
+    """
     print("Extracting text from:", file_path)
     try:
         file_ext = os.path.splitext(file_path)[1].lower()
         print("File extension:", file_ext)
         if file_ext == '.pdf':
             print("pdf")
-            textpdf = _extract_pdf_text(file_path)
+            textpdf = _extract_pdf_text(file_path, max_chars)
             if textpdf:
                 print("loop1")
                 return textpdf
@@ -71,7 +172,7 @@ def extract_cv_text(file_path: str) -> str:
                 raise ValueError("No text found in PDF")
         elif file_ext == '.docx':
             print("docx")
-            return _extract_docx_text(file_path)
+            return _extract_docx_text(file_path, max_chars)
         #raise ValueError(f"Unsupported file type: {file_ext}")
             
     except Exception as e:
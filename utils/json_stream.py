@@ -0,0 +1,190 @@
+# utils/json_stream.py
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SchemaMismatch(ValueError):
+    """Raised as soon as streamed output can no longer match the expected schema"""
+
+
+class IncrementalJSONParser:
+    """Incremental parser for a streamed top-level JSON object.
+
+    Chunks are fed as they arrive; each top-level field is returned the moment
+    its value is complete, so e.g. "name" is available long before the closing
+    brace. With a schema ({key: type}) wrongly typed values raise
+    SchemaMismatch immediately instead of at the end of the generation, and
+    keys outside the schema are skipped. Output that is not a plain JSON
+    object (e.g. double-encoded JSON) is only collected: complete stays False
+    and the caller parses text with its lenient parser.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self.schema = schema
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self.malformed: Optional[str] = None
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (key, value) pairs it completed"""
+        completed: List[Tuple[str, Any]] = []
+        self._text += chunk
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            if self.malformed:
+                break
+            ch = text[i]
+
+            if self.complete:
+                if not ch.isspace():
+                    self._give_up("Trailing data after JSON object")
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "key_string":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._state = "colon"
+                    elif self._depth == 1 and self._state == "in_value":
+                        # Top-level string value is finished
+                        self._collect(completed, text[self._value_start:i + 1])
+                continue
+
+            if self._state == "start":
+                if ch.isspace():
+                    continue
+                if ch != "{":
+                    self._give_up(f"Expected a JSON object, got {ch!r}")
+                    continue
+                self._depth = 1
+                self._state = "key"
+                continue
+
+            if self._depth == 1:
+                if self._state == "key":
+                    if ch.isspace() or ch == ",":
+                        continue
+                    if ch == '"':
+                        self._in_string = True
+                        self._key_start = i
+                        self._state = "key_string"
+                    elif ch == "}":
+                        self._finish()
+                    else:
+                        self._give_up(f"Expected a key, got {ch!r}")
+                    continue
+
+                if self._state == "colon":
+                    if ch.isspace():
+                        continue
+                    if ch != ":":
+                        self._give_up(f"Expected ':', got {ch!r}")
+                        continue
+                    self._state = "value"
+                    continue
+
+                if self._state == "after_value":
+                    if ch.isspace():
+                        continue
+                    if ch == ",":
+                        self._state = "key"
+                    elif ch == "}":
+                        self._finish()
+                    else:
+                        self._give_up(f"Expected ',' or '}}', got {ch!r}")
+                    continue
+
+                if self._state == "value":
+                    if ch.isspace():
+                        continue
+                    self._value_start = i
+                    self._state = "in_value"
+                    # fall through so the opening character is handled below
+
+                if self._state == "in_value":
+                    if ch in ",}" and i > self._value_start:
+                        # End of a number / literal
+                        self._collect(completed, text[self._value_start:i].strip())
+                        if self.malformed:
+                            continue
+                        if ch == "}":
+                            self._finish()
+                        else:
+                            self._state = "key"
+                    elif ch == '"':
+                        self._in_string = True
+                    elif ch in "{[":
+                        self._depth += 1
+                    continue
+
+            # Inside a nested object/array
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._collect(completed, text[self._value_start:i + 1])
+
+        self._pos = len(text)
+        return completed
+
+    def _give_up(self, reason: str) -> None:
+        """Stop parsing structure; the rest is only collected for a lenient parse"""
+        self.malformed = reason
+
+    def _collect(self, completed: List[Tuple[str, Any]], raw: str) -> None:
+        field = self._emit(raw)
+        if field is not None:
+            completed.append(field)
+
+    def _emit(self, raw: str) -> Optional[Tuple[str, Any]]:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            self._give_up(f"Invalid value for {self._key!r}: {raw[:50]}")
+            return None
+
+        self._state = "after_value"
+        if self.schema is not None and self._key not in self.schema:
+            return None  # not asked for; skipped
+
+        if self.schema is not None:
+            expected = self.schema[self._key]
+            if expected is float:
+                expected = (int, float)
+            if not isinstance(value, expected):
+                raise SchemaMismatch(f"Field {self._key!r} has type {type(value).__name__}")
+
+        self.fields[self._key] = value
+        return self._key, value
+
+    def _finish(self) -> None:
+        self._depth = 0
+        self.complete = True
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._text
+
+    def missing_keys(self) -> List[str]:
+        if self.schema is None:
+            return []
+        return [key for key in self.schema if key not in self.fields]
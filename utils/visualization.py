@@ -1,40 +1,147 @@
 # utils/visualization.py
-import plotly.graph_objects as go
-import tempfile
-import os
+import math
+from functools import lru_cache
+from typing import Dict, Tuple
+
+RADAR_MAX_SCORE = 5
+RADAR_FILL = (255, 107, 53, 0.5)  # '#FF6B35' at 50%
+RADAR_LINE = '#292929'
+RADAR_GRID = '#D0D0D0'
+RADAR_CACHE_SIZE = 256
+
+
+def create_radar_figure(analysis_dict):
+    """Interactive Plotly radar chart for the Streamlit UI"""
+    # plotly only loads when a chart is shown
+    import plotly.graph_objects as go
 
-def create_radar_chart(analysis_dict):
-    """Create a radar chart from analysis scores"""
     categories = list(analysis_dict.keys())
     values = list(analysis_dict.values())
-    
+
     fig = go.Figure()
-    
+
     fig.add_trace(go.Scatterpolar(
         r=values + values[:1],  # Close the polygon
         theta=categories + categories[:1],
         fill='toself',
         fillcolor='rgba(255,107,53,0.5)',
-        line=dict(color='#292929')
+        line=dict(color=RADAR_LINE)
     )
     )
-    
+
     fig.update_layout(
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, 5],
-                tickfont=dict(color='#292929')
+                range=[0, RADAR_MAX_SCORE],
+                tickfont=dict(color=RADAR_LINE)
             )
         ),
         paper_bgcolor='white',
         width=500,
         height=400
     )
-    
-    # Save to temp file for PDF reporting
-    temp_dir = tempfile.mkdtemp()
-    chart_path = os.path.join(temp_dir, 'radar_chart.png')
-    fig.write_image(chart_path)
-    
-    return chart_path
\ No newline at end of file
+    return fig
+
+
+def _score(value) -> float:
+    try:
+        return min(max(float(value), 0.0), RADAR_MAX_SCORE)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@lru_cache(maxsize=RADAR_CACHE_SIZE)
+def _radar_geometry(scores: Tuple[Tuple[str, float], ...], width: float, height: float):
+    """Coordinates of every radar chart element, as plain tuples.
+
+    Only this is memoized: tuples are immutable, so the same geometry can be
+    shared between threads, while Drawings are not (ReportLab sets canv and
+    _parent on them while they are drawn).
+    """
+    if not scores:
+        return None
+    categories = [label for label, _ in scores]
+    font_size = 7
+    cx, cy = width / 2, height / 2
+    # Leave room for the axis labels around the plot
+    radius = min(width / 2 - 60, height / 2 - 2 * font_size - 4)
+    angles = [math.pi / 2 - 2 * math.pi * i / len(categories) for i in range(len(categories))]
+
+    def point(angle, r):
+        return cx + r * math.cos(angle), cy + r * math.sin(angle)
+
+    rings = []
+    for ring in range(1, RADAR_MAX_SCORE + 1):
+        r = radius * ring / RADAR_MAX_SCORE
+        ring_points = []
+        for angle in angles + angles[:1]:
+            ring_points.extend(point(angle, r))
+        rings.append((tuple(ring_points), (cx + 2, cy + r + 1, str(ring))))
+
+    spokes = []
+    for angle, label in zip(angles, categories):
+        x, y = point(angle, radius)
+        lx, ly = point(angle, radius + 9)
+        cos = math.cos(angle)
+        anchor = 'middle' if abs(cos) < 0.3 else ('start' if cos > 0 else 'end')
+        ly -= font_size / 2 if abs(cos) >= 0.3 else (0 if math.sin(angle) > 0 else font_size)
+        spokes.append(((cx, cy, x, y), (lx, ly, label.replace('_', ' '), anchor)))
+
+    value_points = []
+    for angle, (_, value) in zip(angles, scores):
+        value_points.extend(point(angle, radius * value / RADAR_MAX_SCORE))
+    return font_size, tuple(rings), tuple(spokes), tuple(value_points)
+
+
+def _build_drawing(geometry, width: float, height: float):
+    from reportlab.graphics.shapes import Drawing, Line, PolyLine, Polygon, String
+    from reportlab.lib import colors
+
+    drawing = Drawing(width, height)
+    if geometry is None:
+        return drawing
+    font_size, rings, spokes, value_points = geometry
+    grid = colors.HexColor(RADAR_GRID)
+    line = colors.HexColor(RADAR_LINE)
+
+    for ring_points, (x, y, text) in rings:
+        drawing.add(PolyLine(list(ring_points), strokeColor=grid, strokeWidth=0.5))
+        drawing.add(String(x, y, text, fontName='Helvetica', fontSize=font_size - 1, fillColor=line))
+
+    for (x1, y1, x2, y2), (lx, ly, text, anchor) in spokes:
+        drawing.add(Line(x1, y1, x2, y2, strokeColor=grid, strokeWidth=0.5))
+        drawing.add(String(lx, ly, text, fontName='Helvetica', fontSize=font_size,
+                           fillColor=line, textAnchor=anchor))
+
+    r, g, b, alpha = RADAR_FILL
+    drawing.add(Polygon(list(value_points),
+                        fillColor=colors.Color(r / 255, g / 255, b / 255, alpha=alpha),
+                        strokeColor=line, strokeWidth=1))
+    return drawing
+
+
+def _score_vector(analysis_dict: Dict[str, float]) -> Tuple[Tuple[str, float], ...]:
+    return tuple((str(k), _score(v)) for k, v in analysis_dict.items())
+
+
+def create_radar_drawing(analysis_dict: Dict[str, float], width: float = 300,
+                         height: float = 250):
+    """Radar chart as ReportLab vector graphics, for embedding straight into a PDF.
+
+    Returns a reportlab Drawing (a Flowable), so reports need no image export
+    or temp files. Same look as the Plotly chart: 0-5 rings, one spoke per
+    category starting at 12 o'clock, orange fill with a dark outline.
+    """
+    geometry = _radar_geometry.__wrapped__(_score_vector(analysis_dict), width, height)
+    return _build_drawing(geometry, width, height)
+
+
+def radar_drawing(analysis_dict: Dict[str, float], width: float = 300, height: float = 250):
+    """create_radar_drawing with the geometry memoized by score vector (bounded LRU).
+
+    Scores are small integers over a fixed set of categories, so identical
+    vectors are common across a batch. Each call still returns a new Drawing,
+    so reports built concurrently never share a flowable.
+    """
+    return _build_drawing(_radar_geometry(_score_vector(analysis_dict), width, height), width, height)
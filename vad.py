@@ -0,0 +1,100 @@
+# vad.py
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from asr_backends import SAMPLE_RATE
+
+Span = Tuple[int, int]  # [start, end) in samples
+
+
+def frame_energy_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS energy per non-overlapping frame, in dBFS"""
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return (20 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) index runs where mask is True"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                  margin_db: float = 12.0, min_threshold_db: float = -50.0,
+                  min_speech_ms: int = 250, min_silence_ms: int = 600,
+                  pad_ms: int = 200) -> List[Span]:
+    """Energy-based voice activity detection.
+
+    A frame counts as speech when it is margin_db above the recording's noise
+    floor (10th percentile frame energy) and above min_threshold_db. Pauses
+    shorter than min_silence_ms are bridged, blips shorter than min_speech_ms
+    dropped, and every span is padded by pad_ms so word edges are not clipped.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    energy = frame_energy_db(audio, frame_len)
+    if energy.size == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy, 10))
+    threshold = max(noise_floor + margin_db, min_threshold_db)
+    speech = energy > threshold
+
+    # Bridge short pauses inside speech
+    max_gap = max(1, min_silence_ms // frame_ms)
+    for start, end in _runs(~speech):
+        if start > 0 and end < len(speech) and end - start < max_gap:
+            speech[start:end] = True
+
+    min_frames = max(1, min_speech_ms // frame_ms)
+    pad = int(sample_rate * pad_ms / 1000)
+    spans: List[Span] = []
+    for start, end in _runs(speech):
+        if end - start < min_frames:
+            continue
+        s = int(max(0, start * frame_len - pad))
+        e = int(min(len(audio), end * frame_len + pad))
+        if spans and s <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], e)
+        else:
+            spans.append((s, e))
+    return spans
+
+
+def apply_vad(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+              **options) -> Tuple[np.ndarray, List[Span], Dict[str, Any]]:
+    """Keep only speech: returns (compacted audio, original spans, stats)"""
+    spans = detect_speech(audio, sample_rate, **options)
+    if spans:
+        speech = np.concatenate([audio[s:e] for s, e in spans])
+    else:
+        speech = audio[:0]
+
+    total = len(audio) / sample_rate
+    kept = len(speech) / sample_rate
+    stats = {
+        "audio_seconds": round(total, 2),
+        "speech_seconds": round(kept, 2),
+        "skipped_seconds": round(total - kept, 2),
+        "skipped_ratio": round((total - kept) / total, 3) if total else 0.0,
+        "speech_spans": len(spans),
+    }
+    return speech, spans, stats
+
+
+def remap_timestamp(t: float, spans: List[Span], sample_rate: int = SAMPLE_RATE) -> float:
+    """Map a time in the compacted (speech-only) audio back to the original recording"""
+    compact_start = 0
+    for start, end in spans:
+        length = end - start
+        if t * sample_rate <= compact_start + length:
+            return round((start + max(0.0, t * sample_rate - compact_start)) / sample_rate, 2)
+        compact_start += length
+    if spans:
+        return round(spans[-1][1] / sample_rate, 2)
+    return t